@@ -0,0 +1,151 @@
+import math
+import numpy as np
+from particle_set import ParticleSet
+from particle_filter import ParticleFilter
+from pose_estimator import estimate_pose
+
+
+class BatchParticleFilter:
+    def __init__(self, num_filters, num_particles, box_size, robot_locs, seed=None, field_model=None):
+        """
+        K independent particle filters advanced together as one (K, N) batch
+
+        Args:
+            num_filters: Number of filters K
+            num_particles: Particles per filter N
+            box_size: Field size in inches as a tuple (width, height)
+            robot_locs: (K, 3) robot locations, or one [x, y, theta] shared by all
+            seed: Seed for the batch's random generator
+            field_model: Field geometry shared by every filter
+        """
+        self.num_filters = num_filters
+        self.num_particles = num_particles
+        self.box_size = box_size
+        self.rng = np.random.default_rng(seed)
+
+        # Sensor layout, sigma and sensor model come from a regular filter so both stay in sync
+        self.model = ParticleFilter(1, box_size, [0, 0, 0], field_model=field_model)
+
+        # (4, K, N) buffer of x, y, theta, weight rows
+        self.buffer = np.zeros((4, num_filters, num_particles))
+        self.x, self.y, self.theta, self.weight = self.buffer
+
+        self.robot_locations = np.broadcast_to(np.asarray(robot_locs, dtype=float), (num_filters, 3)).copy()
+        self.noise = np.full(num_filters, 0.2)
+
+        self.initialize_particles()
+
+    @property
+    def field_model(self):
+        return self.model.field_model
+
+    def initialize_particles(self):
+        """Spread every filter's particles uniformly over the field"""
+        shape = (self.num_filters, self.num_particles)
+        self.x[:] = self.rng.uniform(0, self.box_size[0], shape)
+        self.y[:] = self.rng.uniform(0, self.box_size[1], shape)
+        self.theta[:] = 0
+        self.weight[:] = 1.0 / self.num_particles
+
+    def set_noise(self, noise):
+        """Set the motion noise, either one value or one per filter"""
+        self.noise = np.broadcast_to(np.asarray(noise, dtype=float), (self.num_filters,)).copy()
+
+    def set_robot_locations(self, robot_locs):
+        """Set the (K, 3) robot locations used to simulate measurements"""
+        self.robot_locations = np.broadcast_to(np.asarray(robot_locs, dtype=float), (self.num_filters, 3)).copy()
+
+    def update(self, delta_states):
+        """
+        Motion update of every filter
+
+        Args:
+            delta_states: (K, 3) odometry deltas, or one (dx, dy, dtheta) shared by all
+        """
+        deltas = np.broadcast_to(np.asarray(delta_states, dtype=float), (self.num_filters, 3))
+        shape = (self.num_filters, self.num_particles)
+
+        # Noise proportional to movement, per filter
+        noise = self.noise
+        dx_noise = np.maximum(np.abs(deltas[:, 0]) * noise, noise)[:, None]
+        dy_noise = np.maximum(np.abs(deltas[:, 1]) * noise, noise)[:, None]
+        dtheta_noise = np.maximum(np.abs(deltas[:, 2]) * noise, 0.001)[:, None]
+
+        x = self.x + deltas[:, 0, None] + self.rng.standard_normal(shape) * dx_noise
+        y = self.y + deltas[:, 1, None] + self.rng.standard_normal(shape) * dy_noise
+        theta = self.theta + deltas[:, 2, None] + self.rng.standard_normal(shape) * dtheta_noise
+
+        np.clip(x, 0, self.box_size[0], out=self.x)
+        np.clip(y, 0, self.box_size[1], out=self.y)
+        self.theta[:] = (theta + math.pi) % (2 * math.pi) - math.pi
+
+    def measure(self):
+        """Simulated (K, S) sensor readings at every filter's robot location"""
+        locations = self.robot_locations
+        ray_x, ray_y, headings = self.model.sensor_rays(locations[:, 0], locations[:, 1], locations[:, 2])
+        return self.field_model.cast_rays(ray_x, ray_y, headings)
+
+    def reweight(self, measurements=None):
+        """
+        Weight every filter's particles against its own measurements
+
+        Args:
+            measurements: (K, S) ranges, simulated from the robot locations when None
+        """
+        if measurements is None:
+            measurements = self.measure()
+        measurements = np.asarray(measurements, dtype=float)
+
+        actual = np.repeat(measurements, self.num_particles, axis=0)
+        log_weights = self.model.log_likelihood_at(
+            self.x.ravel(), self.y.ravel(), self.theta.ravel(), actual
+        ).reshape(self.num_filters, self.num_particles)
+
+        # Normalize per filter in log space, uniform where no particle is possible
+        peaks = log_weights.max(axis=1, keepdims=True)
+        finite = np.isfinite(peaks)
+        weights = np.exp(log_weights - np.where(finite, peaks, 0.0))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.weight[:] = np.where(finite, weights / weights.sum(axis=1, keepdims=True), 1.0 / self.num_particles)
+
+    def resample(self):
+        """Low variance resampling of every filter at once"""
+        k, n = self.num_filters, self.num_particles
+        rows = np.arange(k)[:, None]
+
+        # Offset each row's CDF by its row index so one searchsorted covers the whole batch
+        c = np.cumsum(self.weight, axis=1)
+        c /= c[:, -1:]
+        u = self.rng.uniform(0, 1.0 / n, (k, 1)) + np.arange(n) / n
+        indices = np.searchsorted((c + rows).ravel(), (u + rows).ravel()).reshape(k, n) - rows * n
+        indices = np.clip(indices, 0, n - 1)
+
+        self.buffer[:] = np.take_along_axis(self.buffer, indices[None, :, :].repeat(4, axis=0), axis=2)
+
+        shape = (k, n)
+        self.x += self.rng.normal(0, 0.05, shape)
+        self.y += self.rng.normal(0, 0.05, shape)
+        self.theta += self.rng.normal(0, 0.01, shape)
+        self.weight[:] = 1.0 / n
+
+    def get_particles(self, index):
+        """Particle set of one filter (a view, no copy)"""
+        return ParticleSet.from_buffer(self.buffer[:, index, :])
+
+    def get_estimated_states(self):
+        """(K, 3) estimated states of every filter (weighted mean, circular mean for theta)"""
+        totals = self.weight.sum(axis=1)
+        return np.column_stack((
+            (self.weight * self.x).sum(axis=1) / totals,
+            (self.weight * self.y).sum(axis=1) / totals,
+            np.arctan2((self.weight * np.sin(self.theta)).sum(axis=1), (self.weight * np.cos(self.theta)).sum(axis=1)),
+        ))
+
+    def get_pose_estimate(self, index):
+        """Weighted mean pose and 3x3 covariance of one filter"""
+        return estimate_pose(self.x[index], self.y[index], self.theta[index], self.weight[index])
+
+    def get_estimated_state(self, index):
+        """Estimated state of one filter, same contract as ParticleFilter.get_estimated_state"""
+        x, y, theta = self.get_estimated_states()[index]
+        return (float(x), float(y), float(theta))
@@ -0,0 +1,68 @@
+import argparse
+import time
+import numpy as np
+from field_model import FieldModel
+from grid_map import GridMap
+
+
+def random_field(num_segments, size=144.0, max_length=12.0, seed=0):
+    """Box walls plus randomly placed short segments (posts, game elements)"""
+    rng = np.random.default_rng(seed)
+    line_points = [((0, 0), (size, 0)), ((size, 0), (size, size)), ((size, size), (0, size)), ((0, size), (0, 0))]
+    for _ in range(max(0, num_segments - 4)):
+        x1, y1 = rng.uniform(0, size, 2)
+        angle = rng.uniform(0, 2 * np.pi)
+        length = rng.uniform(1, max_length)
+        x2 = float(np.clip(x1 + length * np.cos(angle), 0, size))
+        y2 = float(np.clip(y1 + length * np.sin(angle), 0, size))
+        line_points.append(((float(x1), float(y1)), (x2, y2)))
+    return line_points
+
+
+def time_cast(field_model, x, y, headings, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        distances = field_model.cast_rays(x, y, headings)
+        best = min(best, time.perf_counter() - start)
+    return best, distances
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare linear-scan, grid-indexed and occupancy-grid ray casting")
+    parser.add_argument("--rays", type=int, default=20000, help="Number of ray origins")
+    parser.add_argument("--sensors", type=int, default=4, help="Rays per origin")
+    parser.add_argument("--segments", type=int, nargs="+", default=[4, 16, 64, 256, 1024])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--resolution", type=float, default=0.5, help="Occupancy grid cell size in inches")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    x = rng.uniform(0, 144, args.rays)
+    y = rng.uniform(0, 144, args.rays)
+    headings = rng.uniform(-np.pi, np.pi, (args.rays, args.sensors))
+
+    print(f"{'segments':>8} {'linear ms':>10} {'grid ms':>10} {'speedup':>8} {'max err':>8} {'raster ms':>10} {'med err':>8}")
+    for num_segments in args.segments:
+        line_points = random_field(num_segments)
+        linear = FieldModel(line_points, use_index=False)
+        grid = FieldModel(line_points, use_index=True)
+        raster = GridMap.from_field_model(linear, args.resolution)
+
+        linear_time, expected = time_cast(linear, x, y, headings, args.repeats)
+        grid_time, actual = time_cast(grid, x, y, headings, args.repeats)
+        raster_time, marched = time_cast(raster, x, y, headings, args.repeats)
+
+        finite = np.isfinite(expected)
+        max_err = float(np.abs(expected[finite] - actual[finite]).max()) if finite.any() else 0.0
+        assert np.array_equal(finite, np.isfinite(actual)), "grid and linear scan disagree on misses"
+
+        # The occupancy grid is an approximation, so report its typical error instead
+        raster_err = float(np.median(np.abs(expected[finite] - marched[finite]))) if finite.any() else 0.0
+
+        print(f"{num_segments:>8} {linear_time * 1e3:>10.2f} {grid_time * 1e3:>10.2f} "
+              f"{linear_time / grid_time:>8.2f} {max_err:>8.1e} {raster_time * 1e3:>10.2f} {raster_err:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import argparse
+import time
+import numpy as np
+from resamplers import RESAMPLERS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark the vectorized resamplers")
+    parser.add_argument("--particles", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'particles':>10} " + " ".join(f"{name:>12}" for name in RESAMPLERS) + "   (ms, best of repeats)")
+    for n in args.particles:
+        # Peaked weights, like after a sharp measurement update
+        weights = np.exp(-0.5 * (rng.standard_normal(n) * 3) ** 2)
+        weights /= weights.sum()
+
+        timings = []
+        for resampler in RESAMPLERS.values():
+            best = float("inf")
+            for _ in range(args.repeats):
+                start = time.perf_counter()
+                indices = resampler(weights, n, rng)
+                best = min(best, time.perf_counter() - start)
+            assert len(indices) == n
+            timings.append(best)
+        print(f"{n:>10} " + " ".join(f"{t * 1e3:>12.3f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import json
+import platform
+import time
+import numpy as np
+from field_model import FieldModel
+from grid_map import GridMap
+from simulation import TRAJECTORIES, run_simulation
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless particle filter benchmark over a sweep of particle counts")
+    parser.add_argument("--particles", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--trajectories", nargs="+", choices=sorted(TRAJECTORIES), default=sorted(TRAJECTORIES))
+    parser.add_argument("--ticks", type=int, default=100, help="Ticks per trajectory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc peak memory tracking")
+    parser.add_argument("--map", help="Field map: segment .json, or an occupancy image/.npy for the grid backend")
+    parser.add_argument("--map-resolution", type=float, default=1.0, help="Inches per pixel of an occupancy map")
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    field_model = None
+    if args.map and args.map.endswith(".json"):
+        field_model = FieldModel.from_json(args.map)
+    elif args.map:
+        field_model = GridMap.from_image(args.map, args.map_resolution)
+
+    results = []
+    for name in args.trajectories:
+        trajectory = TRAJECTORIES[name](args.ticks)
+        for num_particles in args.particles:
+            result = run_simulation(trajectory, num_particles, seed=args.seed, trace_memory=not args.no_memory,
+                                    field_model=field_model)
+            results.append(result)
+            print(f"{name:>9} N={num_particles:>7}  {result['ticks_per_second']:8.1f} ticks/s  "
+                  f"err={result['position_error']['mean']:6.2f} in")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "ticks": args.ticks,
+        "seed": args.seed,
+        "map": args.map,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,55 @@
 import numpy as np
 import math
+import hashlib
+import json
 from particle import Particle
+from ray_geometry import intersect_rays_segments
+from spatial_index import SegmentGrid
+from profiler import PROFILER
+
+# Maps with at least this many segments get a spatial index by default
+INDEX_MIN_SEGMENTS = 128
 
 class FieldModel:
-    def __init__(self):
-        self.line_points = [((0, 0), (144, 0)), ((144, 0), (144, 144)), ((144, 144), (0, 144)), ((0, 144), (0, 0))]
+    def __init__(self, line_points=None, use_index=None, cell_size=None):
+        """
+        Initialize the field geometry
+
+        Args:
+            line_points: List of ((x1, y1), (x2, y2)) wall segments, defaults to a 144x144 box
+            use_index: Force the spatial index on/off, None picks based on segment count
+            cell_size: Spatial index cell size in inches (None for automatic)
+        """
+        if line_points is None:
+            line_points = [((0, 0), (144, 0)), ((144, 0), (144, 144)), ((144, 144), (0, 144)), ((0, 144), (0, 0))]
+        self.line_points = [(tuple(p3), tuple(p4)) for p3, p4 in line_points]
+
+        # Packed (M, 4) array of x1, y1, x2, y2 for the batched ray caster
+        self.segments = np.array([(p3[0], p3[1], p4[0], p4[1]) for p3, p4 in self.line_points], dtype=float).reshape(-1, 4)
+
+        if use_index is None:
+            use_index = len(self.segments) >= INDEX_MIN_SEGMENTS
+        self.index = SegmentGrid(self.segments, cell_size) if use_index and len(self.segments) else None
+
+    @classmethod
+    def from_json(cls, path, **kwargs):
+        """
+        Load a field map from JSON
+
+        The file holds a "segments" list of [x1, y1, x2, y2] entries and/or a
+        "polygons" list of closed [[x, y], ...] outlines (goals, posts, ...).
+        """
+        with open(path) as f:
+            data = json.load(f)
+
+        line_points = []
+        for x1, y1, x2, y2 in data.get("segments", []):
+            line_points.append(((x1, y1), (x2, y2)))
+        for polygon in data.get("polygons", []):
+            for i in range(len(polygon)):
+                line_points.append((tuple(polygon[i]), tuple(polygon[(i + 1) % len(polygon)])))
+
+        return cls(line_points, **kwargs)
 
     def get_distance_to_obstacle(self, particle: Particle):
         p1 = (particle.get_state()[0], particle.get_state()[1])
@@ -16,17 +61,102 @@ class FieldModel:
             p3 = line[0]
             p4 = line[1]
 
-
-            if ((p1[0] - p2[0]) * (p3[1] - p4[1]) - (p1[1] - p2[1]) * (p3[0] - p4[0])) == 0: # Parallel lines no intersection
+            denom = (p1[0] - p2[0]) * (p3[1] - p4[1]) - (p1[1] - p2[1]) * (p3[0] - p4[0])
+            if denom == 0: # Parallel lines no intersection
                 continue
 
-            t = ((p1[0] - p3[0]) * (p3[1] - p4[1]) - (p1[1] - p3[1]) * (p3[0] - p4[0])) / ((p1[0] - p2[0]) * (p3[1] - p4[1]) - (p1[1] - p2[1]) * (p3[0] - p4[0]))
+            t = ((p1[0] - p3[0]) * (p3[1] - p4[1]) - (p1[1] - p3[1]) * (p3[0] - p4[0])) / denom
 
-            u = -1*((p1[0] - p2[0]) * (p1[1] - p3[1]) - (p1[1] - p2[1]) * (p1[0] - p3[0])) / ((p1[0] - p2[0]) * (p3[1] - p4[1]) - (p1[1] - p2[1]) * (p3[0] - p4[0]))
+            u = -1*((p1[0] - p2[0]) * (p1[1] - p3[1]) - (p1[1] - p2[1]) * (p1[0] - p3[0])) / denom
 
             if (t >= 0 and 0 <= u and u <= 1):
                 if (min_length is None or min_length > t):
                     min_length = t
 
         return min_length
-    
\ No newline at end of file
+
+    def get_bounds(self):
+        """Return the (min_x, min_y, max_x, max_y) bounding box of the field geometry"""
+        xs = self.segments[:, [0, 2]]
+        ys = self.segments[:, [1, 3]]
+        return (float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max()))
+
+    def rasterize(self, resolution):
+        """
+        Rasterize the wall segments onto a grid of nodes spaced resolution apart
+
+        Returns:
+            Tuple (occupied, origin) of an (nx, ny) boolean grid and the (x, y)
+            position of node [0, 0]
+        """
+        min_x, min_y, max_x, max_y = self.get_bounds()
+        nx = int(math.ceil((max_x - min_x) / resolution)) + 1
+        ny = int(math.ceil((max_y - min_y) / resolution)) + 1
+        occupied = np.zeros((nx, ny), dtype=bool)
+
+        for x1, y1, x2, y2 in self.segments:
+            # Sample densely enough that no node along the segment is skipped
+            steps = max(1, int(math.ceil(4 * math.hypot(x2 - x1, y2 - y1) / resolution)))
+            s = np.linspace(0.0, 1.0, steps + 1)
+            ix = np.rint((x1 + s * (x2 - x1) - min_x) / resolution).astype(np.intp)
+            iy = np.rint((y1 + s * (y2 - y1) - min_y) / resolution).astype(np.intp)
+            occupied[np.clip(ix, 0, nx - 1), np.clip(iy, 0, ny - 1)] = True
+
+        return occupied, (min_x, min_y)
+
+    def geometry_hash(self):
+        """Stable hash of the field geometry, used to key on-disk caches"""
+        return hashlib.sha1(np.ascontiguousarray(self.segments, dtype=np.float64).tobytes()).hexdigest()
+
+    def cast_rays(self, x, y, headings, chunk_size=65536):
+        """
+        Batched version of get_distance_to_obstacle
+
+        Args:
+            x: Ray origin x coordinates, shape (N,) or (N, S)
+            y: Ray origin y coordinates, shape (N,) or (N, S)
+            headings: Ray headings in radians, shape (N,) or (N, S)
+            chunk_size: Max number of ray/segment pairs evaluated at once
+
+        Returns:
+            (N, S) array of distances, np.inf where a ray hits nothing
+        """
+        with PROFILER.stage("ray_cast"):
+            distances = self._cast_rays(x, y, headings, chunk_size)
+        PROFILER.count("ray_casts", distances.size)
+        return distances
+
+    def _cast_rays(self, x, y, headings, chunk_size):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        headings = np.asarray(headings, dtype=float)
+        if headings.ndim == 1:
+            headings = headings[:, None]
+        if x.ndim == 1:
+            x = x[:, None]
+            y = y[:, None]
+        shape = np.broadcast_shapes(x.shape, y.shape, headings.shape)
+
+        # Flatten to one row per ray
+        ox = np.broadcast_to(x, shape).ravel()
+        oy = np.broadcast_to(y, shape).ravel()
+        headings = np.broadcast_to(headings, shape)
+        dx = np.cos(headings).ravel()
+        dy = np.sin(headings).ravel()
+
+        distances = np.full(ox.shape, np.inf)
+        if len(self.segments) == 0:
+            return distances.reshape(shape)
+
+        if self.index is not None:
+            distances = self.index.cast(ox, oy, dx, dy)
+            return distances.reshape(shape)
+
+        x3, y3, x4, y4 = self.segments.T
+        step = max(1, chunk_size // len(self.segments))
+        for lo in range(0, len(ox), step):
+            hi = lo + step
+            t = intersect_rays_segments(ox[lo:hi, None], oy[lo:hi, None], dx[lo:hi, None], dy[lo:hi, None], x3, y3, x4, y4)
+            distances[lo:hi] = t.min(axis=1)
+
+        return distances.reshape(shape)
@@ -0,0 +1,185 @@
+import queue
+import threading
+import time
+from typing import NamedTuple, Optional, Tuple
+from particle_set import ParticleSet
+from profiler import PROFILER
+from update_scheduler import UpdateScheduler
+
+
+class FilterSnapshot(NamedTuple):
+    """Immutable view of the filter after a completed tick"""
+    tick: int
+    particles: ParticleSet
+    estimate: Tuple[float, float, float]
+    robot_location: Optional[Tuple[float, float, float]]
+    tick_seconds: float
+
+
+class DoubleBuffer:
+    """Front/back slots: the writer fills the back slot and swaps, readers only see the front"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._front = None
+        self._back = None
+
+    def publish(self, item):
+        self._back = item
+        with self._lock:
+            self._front, self._back = self._back, self._front
+
+    def latest(self):
+        with self._lock:
+            return self._front
+
+
+class FilterWorker(threading.Thread):
+    def __init__(self, particle_filter, filter_rate=10.0, recorder=None, replayer=None, scheduler=None):
+        """
+        Runs the particle filter loop off the GUI thread
+
+        Odometry and commands are queued from any thread and consumed once per
+        tick; the scheduler decides whether the tick runs a filter update, and
+        each completed update is published as a FilterSnapshot.
+
+        Args:
+            particle_filter: ParticleFilter owned by the worker from now on
+            filter_rate: Filter ticks per second
+            recorder: Optional LogRecorder that every tick's inputs are appended to
+            replayer: Optional LogReplayer to take ticks from instead of the odometry queue
+            scheduler: UpdateScheduler gating updates on motion, run at filter_rate (default: a new one)
+        """
+        super().__init__(daemon=True)
+        self.particle_filter = particle_filter
+        self.filter_rate = filter_rate
+        if scheduler is None:
+            scheduler = UpdateScheduler(filter_rate)
+        else:
+            scheduler.set_base_rate(filter_rate)
+        self.scheduler = scheduler
+        self.recorder = recorder
+        self.replayer = replayer
+        self.replay_index = 0
+        self.snapshots = DoubleBuffer()
+
+        self._inbox = queue.SimpleQueue()
+        self._stop_event = threading.Event()
+        self._tick = 0
+
+    def set_filter_rate(self, filter_rate):
+        self.filter_rate = filter_rate
+        self.scheduler.set_base_rate(filter_rate)
+
+    def submit_odometry(self, delta_state, robot_location):
+        """Queue an odometry delta and the robot location it was measured at"""
+        self._inbox.put(("odometry", tuple(delta_state), tuple(robot_location)))
+
+    def submit(self, command):
+        """Queue a callable(particle_filter) to run on the worker thread between ticks"""
+        self._inbox.put(("command", command, None))
+
+    def latest(self):
+        """Most recent completed snapshot (None before the first tick)"""
+        return self.snapshots.latest()
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        self.join(timeout)
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def _drain(self):
+        """
+        Apply queued commands and hand the queued odometry to the scheduler
+
+        Returns:
+            Tuple (robot_location, changed) of the newest robot location (None if
+            no odometry came in) and whether any command ran
+        """
+        robot_location = None
+        changed = False
+        while True:
+            try:
+                kind, payload, location = self._inbox.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "odometry":
+                self.scheduler.accumulate(payload)
+                robot_location = location
+            else:
+                result = payload(self.particle_filter)
+                changed = True
+                # Commands may hand back a replacement filter, which needs a measurement update
+                if result is not None:
+                    self.particle_filter = result
+                    self.scheduler.force()
+        # Log the changed filter so replays don't diverge from here on, once per
+        # drain however many commands (e.g. slider moves) came in
+        if changed and self.recorder is not None:
+            self.recorder.record_snapshot(self.particle_filter)
+        return robot_location, changed
+
+    def _publish(self, tick_seconds):
+        particle_filter = self.particle_filter
+        buffer = particle_filter.particles.buffer[:, :len(particle_filter.particles)].copy()
+        buffer.setflags(write=False)
+        location = particle_filter.robot_location
+        self.snapshots.publish(FilterSnapshot(
+            tick=self._tick,
+            particles=ParticleSet.from_buffer(buffer),
+            estimate=particle_filter.get_estimated_state(),
+            robot_location=tuple(location) if location is not None else None,
+            tick_seconds=tick_seconds,
+        ))
+
+    def step(self):
+        """Run one filter tick with everything queued so far"""
+        start = time.perf_counter()
+        robot_location, changed = self._drain()
+        particle_filter = self.particle_filter
+
+        if self.replayer is not None:
+            if self.replay_index >= len(self.replayer):
+                return
+            self.replayer.apply(particle_filter, self.replay_index)
+            self.replay_index += 1
+        else:
+            if robot_location is not None:
+                particle_filter.set_robot_location(list(robot_location))
+            if not self.scheduler.should_update():
+                self.scheduler.skip()
+                PROFILER.count("updates_skipped")
+                # Show what a command did (e.g. a resize) without resampling the same evidence
+                if changed:
+                    self._publish(time.perf_counter() - start)
+                return
+            delta = self.scheduler.take()
+            PROFILER.count("updates_executed")
+            measurements = particle_filter.measure()
+
+            if self.recorder is not None:
+                self.recorder.maybe_snapshot(particle_filter)
+                self.recorder.record_tick(delta, particle_filter.robot_location, measurements)
+
+            particle_filter.update(delta)
+            particle_filter.reweight(measurements)
+            particle_filter.resample()
+
+        self._tick += 1
+        tick_seconds = time.perf_counter() - start
+        self.scheduler.record_cost(tick_seconds)
+        self._publish(tick_seconds)
+
+    def run(self):
+        self._publish(0.0)
+        next_tick = time.perf_counter()
+        while not self._stop_event.is_set():
+            self.step()
+            next_tick += self.scheduler.interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self._stop_event.wait(delay)
+            else:
+                # Running behind, don't try to catch up with a burst of ticks
+                next_tick = time.perf_counter()
@@ -0,0 +1,209 @@
+import hashlib
+import math
+import numpy as np
+from particle import Particle
+from profiler import PROFILER
+
+# Cell values of the padded march grid
+FREE, OCCUPIED, OUTSIDE = 0, 1, 2
+
+
+class GridMap:
+    def __init__(self, occupied, resolution=1.0, origin=(0.0, 0.0), max_range=None):
+        """
+        Occupancy-grid field geometry, a drop-in replacement for FieldModel
+
+        Ray casts march cell by cell (DDA) from each origin until they hit an
+        occupied cell, leave the grid or pass max_range, so their cost depends on
+        beam length rather than on how many obstacles the map has.
+
+        Args:
+            occupied: (nx, ny) boolean array, occupied[i, j] covers the cell
+                [origin_x + i * resolution, origin_x + (i + 1) * resolution) x ...
+            resolution: Cell edge length in inches
+            origin: (x, y) of the corner of cell [0, 0]
+            max_range: Longest beam in inches, further hits are reported as misses
+                (defaults to the grid diagonal)
+        """
+        self.occupied = np.ascontiguousarray(occupied, dtype=bool)
+        self.resolution = float(resolution)
+        self.origin_x, self.origin_y = (float(v) for v in origin)
+        self.nx, self.ny = self.occupied.shape
+        if max_range is None:
+            max_range = math.hypot(self.nx, self.ny) * self.resolution
+        self.max_range = float(max_range)
+
+        # Occupancy with a one cell OUTSIDE border, flattened for the ray march
+        cells = np.full((self.nx + 2, self.ny + 2), OUTSIDE, dtype=np.uint8)
+        cells[1:-1, 1:-1] = self.occupied
+        self._cells = cells.ravel()
+
+    @classmethod
+    def from_array(cls, image, resolution=1.0, origin=(0.0, 0.0), threshold=0.5, max_range=None):
+        """
+        Build a grid from an image-layout (rows, cols) array
+
+        Row r, column c is the cell at x = c, y = r (y grows down like the
+        visualizer). Values above threshold are obstacles.
+        """
+        image = np.asarray(image)
+        occupied = image.astype(bool) if image.dtype == bool else image > threshold
+        return cls(occupied.T, resolution, origin, max_range)
+
+    @classmethod
+    def from_image(cls, path, resolution=1.0, origin=(0.0, 0.0), threshold=0.5, max_range=None):
+        """
+        Load a grid from an image file (.npy arrays are passed to from_array)
+
+        Dark pixels are obstacles: a pixel is occupied when its grey level is
+        below threshold * 255.
+        """
+        if str(path).endswith(".npy"):
+            return cls.from_array(np.load(path), resolution, origin, threshold, max_range)
+
+        # Qt is already needed for the visualizer, so use it to decode images
+        from PyQt6.QtGui import QImage
+
+        image = QImage(str(path))
+        if image.isNull():
+            raise ValueError(f"Could not load map image {path}")
+        image = image.convertToFormat(QImage.Format.Format_Grayscale8)
+        width, height = image.width(), image.height()
+        # Rows are padded to 32 bits
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        pixels = np.frombuffer(bits, dtype=np.uint8)
+        grey = pixels.reshape(height, image.bytesPerLine())[:, :width]
+        return cls.from_array(grey < threshold * 255, resolution, origin, max_range=max_range)
+
+    @classmethod
+    def from_field_model(cls, field_model, resolution=0.5, max_range=None):
+        """Rasterize a segment FieldModel into a grid, one cell centred on each raster node"""
+        occupied, (min_x, min_y) = field_model.rasterize(resolution)
+        origin = (min_x - 0.5 * resolution, min_y - 0.5 * resolution)
+        return cls(occupied, resolution, origin, max_range)
+
+    def get_distance_to_obstacle(self, particle: Particle):
+        x, y, theta = particle.get_state()
+        distance = float(self.cast_rays([x], [y], [theta])[0, 0])
+        return distance if math.isfinite(distance) else None
+
+    def get_bounds(self):
+        """Return the (min_x, min_y, max_x, max_y) bounding box of the grid"""
+        return (self.origin_x, self.origin_y,
+                self.origin_x + self.nx * self.resolution, self.origin_y + self.ny * self.resolution)
+
+    def rasterize(self, resolution):
+        """
+        Resample the occupied cells onto a grid of nodes spaced resolution apart
+
+        Returns:
+            Tuple (occupied, origin) of an (nx, ny) boolean grid and the (x, y)
+            position of node [0, 0], same contract as FieldModel.rasterize
+        """
+        min_x, min_y, max_x, max_y = self.get_bounds()
+        nx = int(math.ceil((max_x - min_x) / resolution)) + 1
+        ny = int(math.ceil((max_y - min_y) / resolution)) + 1
+        occupied = np.zeros((nx, ny), dtype=bool)
+
+        # Mark the node nearest to each occupied cell centre
+        ci, cj = np.nonzero(self.occupied)
+        ix = np.rint((ci + 0.5) * self.resolution / resolution).astype(np.intp)
+        iy = np.rint((cj + 0.5) * self.resolution / resolution).astype(np.intp)
+        occupied[np.clip(ix, 0, nx - 1), np.clip(iy, 0, ny - 1)] = True
+
+        return occupied, (min_x, min_y)
+
+    def geometry_hash(self):
+        """Stable hash of the grid and its placement, used to key on-disk caches"""
+        digest = hashlib.sha1(np.packbits(self.occupied).tobytes())
+        digest.update(np.array([self.nx, self.ny, self.resolution, self.origin_x, self.origin_y,
+                                self.max_range], dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    def cast_rays(self, x, y, headings, chunk_size=None):
+        """
+        Batched ray march, same contract as FieldModel.cast_rays
+
+        Args:
+            x: Ray origin x coordinates, shape (N,) or (N, S)
+            y: Ray origin y coordinates, shape (N,) or (N, S)
+            headings: Ray headings in radians, shape (N,) or (N, S)
+            chunk_size: Unused, accepted for FieldModel compatibility
+
+        Returns:
+            (N, S) array of distances, np.inf where a ray hits nothing within max_range
+        """
+        with PROFILER.stage("ray_cast"):
+            distances = self._cast_rays(x, y, headings)
+        PROFILER.count("ray_casts", distances.size)
+        return distances
+
+    def _cast_rays(self, x, y, headings):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        headings = np.asarray(headings, dtype=float)
+        if headings.ndim == 1:
+            headings = headings[:, None]
+        if x.ndim == 1:
+            x = x[:, None]
+            y = y[:, None]
+        shape = np.broadcast_shapes(x.shape, y.shape, headings.shape)
+
+        ox = np.broadcast_to(x, shape).ravel()
+        oy = np.broadcast_to(y, shape).ravel()
+        headings = np.broadcast_to(headings, shape)
+        dx = np.cos(headings).ravel()
+        dy = np.sin(headings).ravel()
+
+        res = self.resolution
+        # Origins on or just outside the grid edge start in the nearest border cell
+        ix = np.clip(np.floor((ox - self.origin_x) / res).astype(np.intp), 0, self.nx - 1)
+        iy = np.clip(np.floor((oy - self.origin_y) / res).astype(np.intp), 0, self.ny - 1)
+
+        # Per-axis step direction, distance between cell walls and distance to the first wall
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step_x = np.where(dx > 0, 1, -1)
+            step_y = np.where(dy > 0, 1, -1)
+            delta_x = np.where(dx != 0, res / np.abs(dx), np.inf)
+            delta_y = np.where(dy != 0, res / np.abs(dy), np.inf)
+            wall_x = self.origin_x + (ix + (step_x > 0)) * res
+            wall_y = self.origin_y + (iy + (step_y > 0)) * res
+            t_x = np.maximum(np.where(dx != 0, (wall_x - ox) / dx, np.inf), 0.0)
+            t_y = np.maximum(np.where(dy != 0, (wall_y - oy) / dy, np.inf), 0.0)
+
+        # March over flat indices into the padded grid, so a step is one add and
+        # leaving the map is just reading a border cell
+        cells = self._cells
+        stride = self.ny + 2
+        cell = (ix + 1) * stride + (iy + 1)
+        step_x = step_x * stride
+
+        distances = np.full(ox.shape, np.inf)
+        start_hit = cells[cell] == OCCUPIED
+        distances[start_hit] = 0.0
+
+        # Only rays still marching are kept, so each pass shrinks as beams terminate
+        rays = np.flatnonzero(~start_hit)
+        cell, step_x, step_y = cell[rays], step_x[rays], step_y[rays]
+        delta_x, delta_y, t_x, t_y = delta_x[rays], delta_y[rays], t_x[rays], t_y[rays]
+
+        while len(rays):
+            along_x = t_x < t_y
+            t = np.minimum(t_x, t_y)
+            cell += np.where(along_x, step_x, step_y)
+            np.add(t_x, delta_x, out=t_x, where=along_x)
+            np.add(t_y, delta_y, out=t_y, where=~along_x)
+
+            value = cells[cell]
+            in_range = t <= self.max_range
+            hit = (value == OCCUPIED) & in_range
+            distances[rays[hit]] = t[hit]
+
+            live = (value == FREE) & in_range
+            if not live.all():
+                rays = rays[live]
+                cell, step_x, step_y = cell[live], step_x[live], step_y[live]
+                delta_x, delta_y, t_x, t_y = delta_x[live], delta_y[live], t_x[live], t_y[live]
+
+        return distances.reshape(shape)
@@ -0,0 +1,118 @@
+import copy
+import math
+import numpy as np
+
+
+def _lower_envelope(f):
+    """
+    D(q, j) = min_k (q - k)² + f(k, j) along axis 0, for every column j at once
+
+    Felzenszwalb & Huttenlocher's lower envelope of parabolas: one sweep builds
+    the envelope and a second reads it off, O(n) per column. The sweeps loop
+    over rows and run every column in lockstep, each with its own stack.
+    """
+    n, m = f.shape
+    cols = np.arange(m)
+    v = np.zeros((n, m), dtype=np.intp)   # Rows whose parabolas form the envelope
+    z = np.empty((n + 1, m))              # Boundaries between envelope parabolas
+    z[0] = -np.inf
+    z[1] = np.inf
+    k = np.zeros(m, dtype=np.intp)        # Top of each column's envelope stack
+
+    for q in range(1, n):
+        fq = f[q] + q * q
+        while True:
+            vk = v[k, cols]
+            s = (fq - (f[vk, cols] + vk * vk)) / (2 * (q - vk))
+            pop = s <= z[k, cols]
+            if not pop.any():
+                break
+            k -= pop
+        k += 1
+        v[k, cols] = q
+        z[k, cols] = s
+        z[k + 1, cols] = np.inf
+
+    d = np.empty((n, m))
+    k[:] = 0
+    for q in range(n):
+        while True:
+            advance = z[k + 1, cols] < q
+            if not advance.any():
+                break
+            k += advance
+        vk = v[k, cols]
+        d[q] = (q - vk) ** 2 + f[vk, cols]
+    return d
+
+
+def distance_transform(occupied):
+    """
+    Exact Euclidean distance transform (in cells) to the nearest occupied cell
+
+    Two separable passes: a scan along y for each column, then the lower
+    envelope of parabolas along x.
+    """
+    nx, ny = occupied.shape
+    far = nx + ny
+    if not occupied.any():
+        return np.full((nx, ny), float(far))
+
+    # Pass 1: distance along y to the nearest occupied cell in the same column
+    j = np.arange(ny)
+    before = np.maximum.accumulate(np.where(occupied, j, -far), axis=1)
+    after = np.minimum.accumulate(np.where(occupied, j, 2 * far)[:, ::-1], axis=1)[:, ::-1]
+    g2 = np.minimum(j - before, after - j).astype(float) ** 2
+
+    # Pass 2: D²(i, j) = min_k (i - k)² + g²(k, j)
+    return np.sqrt(_lower_envelope(g2))
+
+
+class LikelihoodField:
+    def __init__(self, field_model, resolution=0.5, sigma=7.0, z_hit=0.95, z_rand=0.05):
+        """
+        Endpoint (likelihood field) sensor model
+
+        The field is rasterized once, its Euclidean distance transform is taken
+        and the log-likelihood of a beam ending in each cell is stored, so a beam
+        costs one grid lookup.
+
+        Args:
+            field_model: Field geometry to rasterize
+            resolution: Grid cell size in inches
+            sigma: Standard deviation of the endpoint distance to the nearest wall
+            z_hit: Weight of the Gaussian hit component
+            z_rand: Weight of the uniform component (keeps bad beams from zeroing a particle)
+        """
+        self.resolution = float(resolution)
+        self.sigma = float(sigma)
+
+        occupied, (self.min_x, self.min_y) = field_model.rasterize(self.resolution)
+        self.nx, self.ny = occupied.shape
+        self.distances = distance_transform(occupied) * self.resolution
+
+        self.z_hit = z_hit
+        self.z_rand = z_rand
+        self._build_table()
+
+    def _build_table(self):
+        self.log_miss = math.log(self.z_rand)
+        self.log_likelihood = np.log(
+            self.z_hit * np.exp(-(self.distances ** 2) / (2 * self.sigma ** 2)) + self.z_rand
+        )
+
+    def with_sigma(self, sigma):
+        """Copy with a different sigma, reusing the distance transform"""
+        field = copy.copy(self)
+        field.sigma = float(sigma)
+        field._build_table()
+        return field
+
+    def lookup(self, x, y):
+        """Log-likelihood of beams ending at (x, y); endpoints off the map count as random"""
+        ix = np.rint((np.asarray(x) - self.min_x) / self.resolution)
+        iy = np.rint((np.asarray(y) - self.min_y) / self.resolution)
+        inside = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+        ix = np.where(inside, ix, 0).astype(np.intp)
+        iy = np.where(inside, iy, 0).astype(np.intp)
+        return np.where(inside, self.log_likelihood[ix, iy], self.log_miss)
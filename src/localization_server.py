@@ -0,0 +1,378 @@
+import argparse
+import asyncio
+import socket
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from particle_filter import ParticleFilter
+
+# Every frame is a type byte and payload length followed by the payload, all little endian
+FRAME_HEADER = struct.Struct("<BI")
+HELLO_MSG = struct.Struct("<IqdddddI")    # particles, seed (-1 for none), box w/h, x, y, theta, snapshot interval
+STEP_PREFIX = struct.Struct("<IHH")       # sequence number, odometry deltas, measurements
+POSE_MSG = struct.Struct("<II6d")         # sequence number, frames dropped so far, x, y, theta, var x/y/theta
+PARTICLES_PREFIX = struct.Struct("<II")   # sequence number, particle count
+
+# Client to server
+HELLO = 1
+STEP = 2
+PING = 3
+# Server to client
+READY = 16
+POSE = 17
+PARTICLES = 18
+PONG = 19
+ERROR = 20
+
+# Stop sending particle snapshots while this much output is waiting on a slow client
+MAX_WRITE_BUFFER = 1 << 20
+
+
+def pack_frame(frame_type, *parts):
+    length = sum(len(part) for part in parts)
+    return b"".join((FRAME_HEADER.pack(frame_type, length),) + parts)
+
+
+def pack_step(seq, deltas, measurements=None):
+    """STEP payload: a batch of (dx, dy, dtheta) odometry deltas and optional range measurements"""
+    deltas = np.asarray(deltas, dtype="<f8").reshape(-1, 3)
+    measurements = np.asarray(measurements if measurements is not None else (), dtype="<f8")
+    return pack_frame(STEP, STEP_PREFIX.pack(seq, len(deltas), len(measurements)),
+                      deltas.tobytes(), measurements.tobytes())
+
+
+class Session:
+    """Per-connection filter plus the newest not yet processed input"""
+
+    def __init__(self, particle_filter, snapshot_interval):
+        self.particle_filter = particle_filter
+        self.snapshot_interval = snapshot_interval
+        self.steps = 0
+        self.dropped = 0
+
+        self.seq = None
+        self.delta = np.zeros(3)
+        self.measurements = None
+        self.ready = asyncio.Event()
+
+    def offer(self, seq, deltas, measurements):
+        """
+        Merge a STEP into the pending input
+
+        If the filter hasn't caught up with the previous frame yet, that frame is
+        dropped: its odometry is folded into this one (motion must not be lost)
+        but its measurements are replaced by the newer ones.
+        """
+        if self.seq is not None:
+            self.dropped += 1
+        self.seq = seq
+        self.delta += deltas.sum(axis=0)
+        if len(measurements):
+            self.measurements = measurements
+        self.ready.set()
+
+    def take(self):
+        seq, delta, measurements = self.seq, self.delta, self.measurements
+        self.seq = None
+        self.delta = np.zeros(3)
+        self.measurements = None
+        self.ready.clear()
+        return seq, delta, measurements
+
+    def step(self, delta, measurements):
+        """Run one filter update (on the executor) and return the pose estimate"""
+        particle_filter = self.particle_filter
+        particle_filter.update(delta)
+        if measurements is not None:
+            particle_filter.reweight(measurements)
+            particle_filter.resample()
+        self.steps += 1
+        return particle_filter.get_pose_estimate()
+
+
+class LocalizationServer:
+    def __init__(self, field_model=None, workers=None, backend="serial"):
+        """
+        Asyncio server that runs one ParticleFilter per client connection
+
+        Clients send a HELLO to create their filter and then stream STEP frames
+        (batched odometry deltas plus measurements); every processed STEP is
+        answered with a POSE, and every snapshot_interval steps with a float32
+        PARTICLES frame as well. Input that arrives while the session's filter
+        is busy is coalesced rather than queued, so a client always gets the
+        pose for its newest data.
+
+        Args:
+            field_model: Field geometry shared by all sessions (None for the default box)
+            workers: Threads running filter updates, so sessions don't block each other
+            backend: ParticleFilter backend for new sessions
+        """
+        self.field_model = field_model
+        self.backend = backend
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mcl-session")
+        self.sessions = set()
+        self._servers = []
+
+    async def start_tcp(self, host="127.0.0.1", port=5757):
+        # asyncio already sets TCP_NODELAY, so small frames go out immediately
+        server = await asyncio.start_server(self._handle, host, port)
+        self._servers.append(server)
+        return server
+
+    async def start_unix(self, path):
+        server = await asyncio.start_unix_server(self._handle, path)
+        self._servers.append(server)
+        return server
+
+    async def serve_forever(self):
+        await asyncio.gather(*(server.serve_forever() for server in self._servers))
+
+    async def close(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers = []
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _create_filter(self, payload):
+        num_particles, seed, box_w, box_h, x, y, theta, snapshot_interval = HELLO_MSG.unpack(payload)
+        particle_filter = ParticleFilter(num_particles, (box_w, box_h), [x, y, theta],
+                                         seed=None if seed < 0 else seed,
+                                         field_model=self.field_model, backend=self.backend)
+        return Session(particle_filter, snapshot_interval)
+
+    async def _handle(self, reader, writer):
+        session = None
+        processor = None
+        try:
+            while True:
+                try:
+                    frame_type, length = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                    payload = await reader.readexactly(length)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                if frame_type == PING:
+                    writer.write(pack_frame(PONG, payload))
+                elif frame_type == HELLO:
+                    if session is not None:
+                        writer.write(pack_frame(ERROR, b"session already started"))
+                        continue
+                    if len(payload) != HELLO_MSG.size:
+                        writer.write(pack_frame(ERROR, f"HELLO must be {HELLO_MSG.size} bytes".encode()))
+                        continue
+                    if HELLO_MSG.unpack(payload)[0] == 0:
+                        writer.write(pack_frame(ERROR, b"HELLO needs at least one particle"))
+                        continue
+                    loop = asyncio.get_running_loop()
+                    try:
+                        session = await loop.run_in_executor(self.executor, self._create_filter, payload)
+                    except Exception as e:
+                        writer.write(pack_frame(ERROR, f"could not create filter: {e}".encode()))
+                        continue
+                    self.sessions.add(session)
+                    processor = asyncio.create_task(self._process(session, writer))
+                    writer.write(pack_frame(READY, struct.pack("<I", len(session.particle_filter.particles))))
+                elif frame_type == STEP:
+                    if session is None:
+                        writer.write(pack_frame(ERROR, b"STEP before HELLO"))
+                        continue
+                    if len(payload) < STEP_PREFIX.size or (len(payload) - STEP_PREFIX.size) % 8:
+                        writer.write(pack_frame(ERROR, b"malformed STEP"))
+                        continue
+                    seq, num_deltas, num_measurements = STEP_PREFIX.unpack_from(payload)
+                    values = np.frombuffer(payload, dtype="<f8", offset=STEP_PREFIX.size)
+                    num_sensors = len(session.particle_filter.sensor_offsets)
+                    if num_measurements not in (0, num_sensors) or len(values) != 3 * num_deltas + num_measurements:
+                        writer.write(pack_frame(ERROR, f"expected 0 or {num_sensors} measurements".encode()))
+                        continue
+                    session.offer(seq, values[:3 * num_deltas].reshape(-1, 3), values[3 * num_deltas:])
+                else:
+                    writer.write(pack_frame(ERROR, f"unknown frame type {frame_type}".encode()))
+        finally:
+            if processor is not None:
+                processor.cancel()
+            if session is not None:
+                self.sessions.discard(session)
+                session.particle_filter.close()
+            writer.close()
+
+    async def _process(self, session, writer):
+        """Run the session's filter on the newest pending input whenever there is some"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await session.ready.wait()
+            seq, delta, measurements = session.take()
+            try:
+                estimate = await loop.run_in_executor(self.executor, session.step, delta, measurements)
+            except Exception as e:
+                # Tell the client instead of leaving it waiting for a POSE that never comes
+                writer.write(pack_frame(ERROR, f"step {seq} failed: {e}".encode()))
+                continue
+
+            # Snapshots are a nice-to-have, skip them rather than pile up output for a slow reader.
+            # They go out ahead of the POSE so a client waiting for the pose already has them.
+            if (session.snapshot_interval and session.steps % session.snapshot_interval == 0
+                    and writer.transport.get_write_buffer_size() < MAX_WRITE_BUFFER):
+                particles = session.particle_filter.particles
+                buffer = particles.buffer[:, :len(particles)].astype("<f4")
+                writer.write(pack_frame(PARTICLES, PARTICLES_PREFIX.pack(seq, len(particles)), buffer.tobytes()))
+
+            variances = np.diag(estimate.covariance)
+            writer.write(pack_frame(POSE, POSE_MSG.pack(seq, session.dropped, *estimate.mean, *variances)))
+
+
+def parse_address(address):
+    """'host:port' for TCP, anything else (e.g. /tmp/mcl.sock) is a Unix socket path"""
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return host, int(port)
+    return address
+
+
+class LocalizationClient:
+    def __init__(self, address):
+        """
+        Blocking client for robot code
+
+        Args:
+            address: 'host:port' or a Unix socket path
+        """
+        address = parse_address(address)
+        if isinstance(address, tuple):
+            self.sock = socket.create_connection(address)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        else:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(address)
+        self.file = self.sock.makefile("rb")
+        self.seq = 0
+        self.latest_particles = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def recv(self):
+        """Read one frame, returns (frame_type, payload)"""
+        header = self.file.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            raise ConnectionError("localization server closed the connection")
+        frame_type, length = FRAME_HEADER.unpack(header)
+        payload = self.file.read(length)
+        if frame_type == ERROR:
+            raise RuntimeError(payload.decode())
+        return frame_type, payload
+
+    def hello(self, num_particles, box_size, initial_pose, seed=None, snapshot_interval=0):
+        """Create this connection's filter, returns its particle count"""
+        self.sock.sendall(pack_frame(HELLO, HELLO_MSG.pack(
+            num_particles, -1 if seed is None else seed, *box_size, *initial_pose, snapshot_interval)))
+        frame_type, payload = self.recv()
+        return struct.unpack("<I", payload)[0]
+
+    def send_step(self, deltas, measurements=None):
+        """Send a STEP without waiting for its pose, returns its sequence number"""
+        self.seq += 1
+        self.sock.sendall(pack_step(self.seq, deltas, measurements))
+        return self.seq
+
+    def recv_pose(self):
+        """
+        Wait for the next POSE (keeping any particle snapshot in latest_particles)
+
+        Returns:
+            Tuple (seq, dropped, mean, variances)
+        """
+        while True:
+            frame_type, payload = self.recv()
+            if frame_type == POSE:
+                seq, dropped, *values = POSE_MSG.unpack(payload)
+                return seq, dropped, tuple(values[:3]), tuple(values[3:])
+            if frame_type == PARTICLES:
+                seq, count = PARTICLES_PREFIX.unpack_from(payload)
+                self.latest_particles = np.frombuffer(payload, dtype="<f4", offset=PARTICLES_PREFIX.size).reshape(4, count)
+
+    def step(self, deltas, measurements=None):
+        """Send a STEP and wait for its pose"""
+        self.send_step(deltas, measurements)
+        return self.recv_pose()
+
+    def ping(self):
+        """Round trip time in seconds of an empty frame"""
+        start = time.perf_counter()
+        self.sock.sendall(pack_frame(PING))
+        self.recv()
+        return time.perf_counter() - start
+
+
+def bench(address, count, num_particles):
+    """Print ping and STEP round trip times against a running server"""
+    with LocalizationClient(address) as client:
+        client.hello(num_particles, (144, 144), (72, 72, 0), seed=0)
+        pings = sorted(client.ping() for _ in range(count))
+        steps = []
+        for _ in range(count):
+            start = time.perf_counter()
+            client.step([(0.5, 0.0, 0.0)], [71.5, 71.5, 71.5, 71.5])
+            steps.append(time.perf_counter() - start)
+        steps.sort()
+    print(f"ping  p50 {pings[len(pings) // 2] * 1e6:8.1f} us  p99 {pings[int(len(pings) * 0.99)] * 1e6:8.1f} us")
+    print(f"step  p50 {steps[len(steps) // 2] * 1e6:8.1f} us  p99 {steps[int(len(steps) * 0.99)] * 1e6:8.1f} us"
+          f"  ({num_particles} particles)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve particle filter localization over a local socket")
+    parser.add_argument("--tcp", metavar="HOST:PORT", help="Listen on a TCP address, e.g. 127.0.0.1:5757")
+    parser.add_argument("--unix", metavar="PATH", help="Listen on a Unix socket")
+    parser.add_argument("--map", help="Field map: segment .json, or an occupancy image/.npy")
+    parser.add_argument("--map-resolution", type=float, default=1.0, help="Inches per pixel of an occupancy map")
+    parser.add_argument("--workers", type=int, default=None, help="Filter update threads")
+    parser.add_argument("--bench", metavar="ADDRESS", help="Measure round trips against a running server instead")
+    parser.add_argument("--count", type=int, default=1000, help="Round trips for --bench")
+    parser.add_argument("--particles", type=int, default=500, help="Particles for --bench")
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.bench, args.count, args.particles)
+        return
+    if not args.tcp and not args.unix:
+        parser.error("give --tcp and/or --unix")
+
+    field_model = None
+    if args.map and args.map.endswith(".json"):
+        from field_model import FieldModel
+        field_model = FieldModel.from_json(args.map)
+    elif args.map:
+        from grid_map import GridMap
+        field_model = GridMap.from_image(args.map, args.map_resolution)
+
+    async def serve():
+        server = LocalizationServer(field_model, workers=args.workers)
+        if args.tcp:
+            await server.start_tcp(*parse_address(args.tcp))
+            print(f"Listening on tcp://{args.tcp}")
+        if args.unix:
+            await server.start_unix(args.unix)
+            print(f"Listening on unix://{args.unix}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,33 @@
 import sys
+import argparse
 from PyQt6.QtWidgets import QApplication
 from particle_visualizer import ParticleVisualizer
+from replay_log import LogRecorder, LogReplayer
+from update_scheduler import UpdateScheduler
 import time
 
 def main():
+    parser = argparse.ArgumentParser(description="Particle filter visualization")
+    parser.add_argument("--record", metavar="LOG", help="Record every filter tick to a binary log")
+    parser.add_argument("--snapshot-interval", type=int, default=100, help="Ticks between particle snapshots when recording")
+    parser.add_argument("--replay", metavar="LOG", help="Drive the filter from a recorded log instead of the mouse")
+    parser.add_argument("--seek", type=int, default=None, help="Start the replay from this tick")
+    parser.add_argument("--filter-rate", type=float, default=10.0, help="Filter ticks per second")
+    parser.add_argument("--min-translation", type=float, default=0.5, help="Inches of motion before the filter updates")
+    parser.add_argument("--min-rotation", type=float, default=0.05, help="Radians of rotation before the filter updates")
+    parser.add_argument("--tick-budget", type=float, default=None, help="Seconds per update before the tick rate backs off")
+    args, qt_args = parser.parse_known_args()
+
+    recorder = LogRecorder(args.record, 4, args.snapshot_interval) if args.record else None
+    replayer = LogReplayer(args.replay) if args.replay else None
+    scheduler = UpdateScheduler(min_translation=args.min_translation, min_rotation=args.min_rotation,
+                                tick_budget=args.tick_budget)
+
     # 5 second sleep to let me record the video
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_args)
     # Create visualizer with a 12x12 inch box
-    visualizer = ParticleVisualizer((144, 144))
+    visualizer = ParticleVisualizer((144, 144), recorder=recorder, replayer=replayer, replay_seek=args.seek,
+                                    filter_rate=args.filter_rate, scheduler=scheduler)
     sys.exit(app.exec())
 
 
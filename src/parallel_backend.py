@@ -0,0 +1,148 @@
+import os
+import multiprocessing
+import weakref
+import numpy as np
+from multiprocessing import shared_memory
+from particle_set import ParticleSet
+
+# Per-worker state, set up once by _init_worker
+_worker_filter = None
+_worker_blocks = {}
+
+
+def _attach(name):
+    """Attach to a shared block by name, caching the mapping inside the worker"""
+    block = _worker_blocks.get(name)
+    if block is None:
+        for stale in list(_worker_blocks):
+            _worker_blocks.pop(stale).close()
+        block = shared_memory.SharedMemory(name=name)
+        _worker_blocks[name] = block
+    return block
+
+
+def _init_worker(field_model, range_table, likelihood_field):
+    global _worker_filter
+    from particle_filter import ParticleFilter
+
+    _worker_filter = ParticleFilter(1, (144, 144), [0, 0, 0], field_model=field_model)
+    _worker_filter.range_table = range_table
+    _worker_filter.likelihood_field = likelihood_field
+
+
+def _run_shard(task):
+    """Run one stage on a shard [lo, hi) of the shared particle buffer, in place"""
+    name, capacity, lo, hi, stage, config, argument, seed = task
+    block = _attach(name)
+    buffer = np.ndarray((4, capacity), dtype=np.float64, buffer=block.buf)
+
+    particle_filter = _worker_filter
+    for key, value in config.items():
+        setattr(particle_filter, key, value)
+    particle_filter.particles = ParticleSet.from_buffer(buffer[:, lo:hi])
+
+    try:
+        if stage == "update":
+            particle_filter.rng = np.random.default_rng(seed)
+            particle_filter.update(argument)
+        elif stage == "log_likelihood":
+            particle_filter.particles.weight[:] = particle_filter.log_likelihood(argument)
+    finally:
+        # Drop the views so the block can be closed when the buffer is replaced
+        particle_filter.particles = None
+        del buffer
+
+
+class ParallelBackend:
+    def __init__(self, particle_filter, workers=None):
+        """
+        Process pool that runs the motion update and sensor likelihood on
+        shards of a particle set held in multiprocessing.shared_memory
+
+        Only the (small) filter settings cross the process boundary; particle
+        data is read and written in place by the workers.
+
+        Args:
+            particle_filter: Owning ParticleFilter
+            workers: Number of worker processes (defaults to the CPU count)
+        """
+        self.particle_filter = weakref.proxy(particle_filter)
+        self.workers = workers or os.cpu_count() or 1
+        self.block = None
+        self._retired = []
+        self._context = multiprocessing.get_context("spawn")
+        self.pool = None
+        self._pool_ref = [None]
+        self._finalizer = weakref.finalize(self, ParallelBackend._cleanup, self._retired, self._pool_ref)
+        self.restart()
+
+    @staticmethod
+    def _cleanup(retired, pool_ref):
+        pool = pool_ref[0]
+        if pool is not None:
+            pool.terminate()
+        for block in retired:
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+            try:
+                block.close()
+            except BufferError:
+                pass
+        retired.clear()
+
+    def restart(self):
+        """(Re)start the worker pool with the filter's current field model, range table and likelihood field"""
+        if self.pool is not None:
+            self.pool.terminate()
+        self.pool = self._context.Pool(
+            self.workers,
+            initializer=_init_worker,
+            initargs=(
+                self.particle_filter.field_model,
+                self.particle_filter.range_table,
+                self.particle_filter.likelihood_field,
+            ),
+        )
+        self._pool_ref[0] = self.pool
+
+    def allocate(self, capacity):
+        """ParticleSet allocator backed by a new shared memory block"""
+        block = shared_memory.SharedMemory(create=True, size=4 * capacity * np.dtype(np.float64).itemsize)
+        buffer = np.ndarray((4, capacity), dtype=np.float64, buffer=block.buf)
+        buffer[:] = 0.0
+
+        # The old block stays mapped until nothing references it, but its name goes now
+        if self.block is not None:
+            self.block.unlink()
+        self.block = block
+        self._retired.append(block)
+        return buffer
+
+    def _shards(self):
+        count = len(self.particle_filter.particles)
+        bounds = np.linspace(0, count, min(self.workers, max(count, 1)) + 1).astype(int)
+        return [(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+    def _run(self, stage, argument):
+        particles = self.particle_filter.particles
+        config = self.particle_filter.worker_config()
+        seeds = self.particle_filter.rng.integers(0, 2**63, len(self._shards()))
+        tasks = [
+            (self.block.name, particles.capacity, lo, hi, stage, config, argument, int(seed))
+            for (lo, hi), seed in zip(self._shards(), seeds)
+        ]
+        self.pool.map(_run_shard, tasks)
+
+    def update(self, delta_state):
+        """Motion update of every shard in place"""
+        self._run("update", tuple(float(d) for d in delta_state))
+
+    def log_likelihood(self, measurements):
+        """Write each particle's unnormalized log-likelihood into the shared weight array"""
+        self._run("log_likelihood", np.asarray(measurements, dtype=float))
+
+    def close(self):
+        self.pool = None
+        self._finalizer()
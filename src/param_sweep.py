@@ -0,0 +1,190 @@
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from simulation import STAGES, TRAJECTORIES, run_simulation
+
+# Parameters that make up one sweep configuration, in output order
+PARAMS = ("num_particles", "noise", "sigma", "jitter")
+
+
+def config_key(config):
+    return json.dumps([config[name] for name in PARAMS])
+
+
+def run_key(config, trajectory, seed, ticks):
+    return json.dumps([config[name] for name in PARAMS] + [trajectory, seed, ticks])
+
+
+def _run_task(config, trajectory_name, seed, ticks):
+    """Run one configuration on one seeded trajectory (in a pool worker)"""
+    def configure(particle_filter):
+        particle_filter.set_noise(config["noise"])
+        particle_filter.set_sigma(config["sigma"])
+        jitter = config["jitter"]
+        particle_filter.set_resampler(particle_filter.resampler, jitter=(jitter, jitter, jitter / 5))
+
+    trajectory = TRAJECTORIES[trajectory_name](ticks)
+    result = run_simulation(trajectory, config["num_particles"], seed=seed, trace_memory=False, configure=configure)
+    return {
+        **config,
+        "trajectory": trajectory_name,
+        "seed": seed,
+        "ticks": ticks,
+        "tick_seconds": sum(result["stage_seconds"][stage]["mean"] for stage in STAGES),
+        "position_error": result["position_error"]["mean"],
+        "position_error_p95": result["position_error"]["p95"],
+        "final_position_error": result["final_position_error"],
+        "heading_error": result["heading_error"]["mean"],
+    }
+
+
+def load_results(path):
+    """
+    Runs already in a sweep file
+
+    Returns:
+        Tuple (results, length) where length is the number of bytes up to the
+        last complete line, so a line torn by an interrupted sweep can be cut off
+    """
+    results = []
+    length = 0
+    if not os.path.exists(path):
+        return results, length
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+            if not line.endswith(b"\n"):
+                results.pop()
+                break
+            length += len(line)
+    return results, length
+
+
+def run_sweep(configs, trajectories, seeds, ticks, output, workers=None):
+    """
+    Run every configuration on every trajectory and seed, appending one JSON line per run
+
+    Runs already present in output are skipped, so an interrupted sweep picks up
+    where it stopped.
+
+    Returns:
+        List of all run records (previous and new)
+    """
+    results, length = load_results(output)
+    done = {run_key(r, r["trajectory"], r["seed"], r["ticks"]) for r in results}
+    tasks = [(config, name, seed) for config in configs for name in trajectories for seed in seeds
+             if run_key(config, name, seed, ticks) not in done]
+    print(f"{len(tasks)} runs to do, {len(done)} already in {output}")
+
+    with open(output, "a") as f:
+        f.truncate(length)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_task, config, name, seed, ticks) for config, name, seed in tasks]
+            for i, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                f.write(json.dumps(result) + "\n")
+                f.flush()
+                results.append(result)
+                print(f"[{i}/{len(tasks)}] {config_key(result)} {result['trajectory']} seed={result['seed']} "
+                      f"err={result['position_error']:.2f} in  {result['tick_seconds'] * 1e3:.2f} ms/tick")
+    return results
+
+
+def summarize(results, group_by=None):
+    """
+    Average each configuration's runs, optionally per trajectory
+
+    Returns:
+        Dict of group name to a list of {params..., runs, position_error, ...} sorted by cost
+    """
+    groups = {}
+    for result in results:
+        group = result[group_by] if group_by else "all"
+        groups.setdefault(group, {}).setdefault(config_key(result), []).append(result)
+
+    summary = {}
+    for group, configs in groups.items():
+        rows = []
+        for runs in configs.values():
+            row = {name: runs[0][name] for name in PARAMS}
+            row["runs"] = len(runs)
+            for metric in ("tick_seconds", "position_error", "position_error_p95", "final_position_error"):
+                row[metric] = float(np.mean([run[metric] for run in runs]))
+            rows.append(row)
+        summary[group] = sorted(rows, key=lambda row: row["tick_seconds"])
+    return summary
+
+
+def pareto_frontier(rows, error="position_error"):
+    """Configurations no other configuration beats on both cost and error (rows sorted by cost)"""
+    frontier = []
+    best = float("inf")
+    for row in rows:
+        if row[error] < best:
+            frontier.append(row)
+            best = row[error]
+    return frontier
+
+
+def cheapest_meeting(rows, target, error="position_error"):
+    """Lowest cost configuration whose error is within target, or None"""
+    for row in rows:
+        if row[error] <= target:
+            return row
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep filter parameters over seeded trajectories")
+    parser.add_argument("--particles", type=int, nargs="+", default=[100, 300, 1000, 3000])
+    parser.add_argument("--noise", type=float, nargs="+", default=[0.1, 0.2, 0.4])
+    parser.add_argument("--sigma", type=float, nargs="+", default=[3.0, 7.0, 15.0])
+    parser.add_argument("--jitter", type=float, nargs="+", default=[0.05, 0.5],
+                        help="Resample jitter std in inches (heading jitter is a fifth of it in radians)")
+    parser.add_argument("--trajectories", nargs="+", choices=sorted(TRAJECTORIES), default=sorted(TRAJECTORIES))
+    parser.add_argument("--seeds", type=int, default=3, help="Seeds 0..N-1 per trajectory")
+    parser.add_argument("--ticks", type=int, default=100, help="Ticks per trajectory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--error-target", type=float, default=3.0, help="Mean position error (inches) to meet")
+    parser.add_argument("--output", default="sweep_results.jsonl", help="Per-run results, appended as they finish")
+    parser.add_argument("--summary", default="sweep_summary.json", help="Frontiers and picks per trajectory")
+    args = parser.parse_args()
+
+    configs = [dict(zip(PARAMS, values))
+               for values in itertools.product(args.particles, args.noise, args.sigma, args.jitter)]
+    results = run_sweep(configs, args.trajectories, range(args.seeds), args.ticks, args.output, args.workers)
+
+    # Only report on the grid asked for this time, the file may hold runs from earlier sweeps
+    wanted = {config_key(config) for config in configs}
+    results = [r for r in results if config_key(r) in wanted and r["trajectory"] in args.trajectories
+               and r["seed"] < args.seeds and r["ticks"] == args.ticks]
+
+    report = {"error_target": args.error_target, "groups": {}}
+    for group, rows in {**summarize(results), **summarize(results, "trajectory")}.items():
+        frontier = pareto_frontier(rows)
+        pick = cheapest_meeting(rows, args.error_target)
+        report["groups"][group] = {"frontier": frontier, "cheapest_meeting_target": pick, "configs": rows}
+
+        print(f"\n{group}: cost/error frontier")
+        print(f"{'particles':>9} {'noise':>6} {'sigma':>6} {'jitter':>6} {'ms/tick':>8} {'err in':>7} {'p95 in':>7}")
+        for row in frontier:
+            print(f"{row['num_particles']:>9} {row['noise']:>6.2f} {row['sigma']:>6.1f} {row['jitter']:>6.2f} "
+                  f"{row['tick_seconds'] * 1e3:>8.2f} {row['position_error']:>7.2f} {row['position_error_p95']:>7.2f}")
+        if pick is None:
+            print(f"  nothing meets {args.error_target} in")
+        else:
+            print(f"  cheapest under {args.error_target} in: {config_key(pick)}")
+
+    with open(args.summary, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,176 +1,540 @@
-import random
-from particle import Particle
+import numpy as np
+from particle_set import ParticleSet
 from field_model import FieldModel
+from parallel_backend import ParallelBackend
+from likelihood_field import LikelihoodField
+from resamplers import RESAMPLERS, multinomial
+from pose_estimator import estimate_pose, extract_clusters
+from profiler import PROFILER
 import math
+import time
+from statistics import NormalDist
 
 class ParticleFilter:
-    def __init__(self, num_particles, box_size, robot_loc):
+    def __init__(self, num_particles, box_size, robot_loc, seed=None, field_model=None, backend="serial", workers=None):
+        """
+        Initialize the particle filter
+
+        Args:
+            num_particles: Number of particles
+            box_size: Field size in inches as a tuple (width, height)
+            robot_loc: Robot location as [x, y, theta]
+            seed: Seed for the filter's random generator
+            field_model: Field geometry to localize against (defaults to the 144x144 box)
+            backend: "serial" or "parallel" (process pool over shared-memory shards)
+            workers: Number of worker processes for the parallel backend
+        """
         self.num_particles = num_particles
-        self.particles = []
         self.box_size = box_size
+        self.rng = np.random.default_rng(seed)
+        self.field_model = field_model if field_model is not None else FieldModel()
+        self.range_table = None
+        self.likelihood_field = None
+
+        self.backend = None
+        if backend == "parallel":
+            self.backend = ParallelBackend(self, workers)
+            self.particles = ParticleSet(num_particles, allocate=self.backend.allocate)
+        elif backend == "serial":
+            self.particles = ParticleSet(num_particles)
+        else:
+            raise ValueError(f"Unknown backend: {backend}")
         self.initialize_particles()
-        self.field_model = FieldModel()
         self.robot_location = robot_loc
 
         self.noise = 0.2
 
+        # 4 dist sensors, one per side, as (dx, dy, dtheta) in the robot frame
+        self.sensor_offsets = np.array([[0.0, 0.0, i * math.pi / 2] for i in range(4)])
+        self.sigma = 7.0  # Goofy sigma
+        self.sensor_model = "raycast"
+
+        # Resampling: which resampler, the ESS fraction below which to resample and the (x, y, theta) jitter
+        self.resampler = "systematic"
+        self.resample_threshold = 0.5
+        self.resample_jitter = (0.05, 0.05, 0.01)
+
+        # KLD-sampling (adaptive particle count), off by default
+        self.adaptive = False
+        self.kld_bin_size = (2.0, 2.0, math.radians(10))
+        self.kld_epsilon = 0.05
+        self.kld_delta = 0.01
+        self.min_particles = 100
+        self.max_particles = 50000
+        self.kld_stats = None
+
+        # Wall time of the most recent update/reweight/resample calls
+        self.stage_seconds = {"update": 0.0, "reweight": 0.0, "resample": 0.0}
+
     def initialize_particles(self):
         """Initialize particles around the initial state"""
         # Uniform distribution!!!
-        for _ in range(self.num_particles):
-            x = random.uniform(0, self.box_size[0])
-            y = random.uniform(0, self.box_size[1])
-            theta = 0
-            weight = 1.0 / self.num_particles
-            particle = Particle((x, y, theta), weight)
-            self.particles.append(particle)
+        n = self.num_particles
+        self.particles.reset(n)
+        self.particles.x[:] = self.rng.uniform(0, self.box_size[0], n)
+        self.particles.y[:] = self.rng.uniform(0, self.box_size[1], n)
+        self.particles.theta[:] = 0
+        self.particles.weight[:] = 1.0 / n
+
+    def load_particles(self, x, y, theta, weight):
+        """Replace the particle set with the given state arrays (e.g. from a snapshot)"""
+        n = len(x)
+        self.particles.reset(n)
+        self.particles.x[:] = x
+        self.particles.y[:] = y
+        self.particles.theta[:] = theta
+        self.particles.weight[:] = weight
+        self.num_particles = n
 
     def get_particles(self):
-        """Return the list of particles"""
+        """Return the particle set (iterable of Particle-like views)"""
         return self.particles
     
     def update(self, delta_state):
         """Update the particles based on the new state with noise proportional to movement"""
-        for particle in self.particles:
+        with PROFILER.stage("update", len(self.particles)):
+            start = time.perf_counter()
+            if self.backend is not None:
+                self.backend.update(delta_state)
+                self.stage_seconds["update"] = time.perf_counter() - start
+                return
+
+            particles = self.particles
+            n = len(particles)
+
             # Calculate noise proportional to movement magnitude
-            dx_noise = abs(delta_state[0]) * self.noise
-            dy_noise = abs(delta_state[1]) * self.noise
-            dtheta_noise = abs(delta_state[2]) * self.noise
-            
-            dx_noise = max(dx_noise, self.noise)
-            dy_noise = max(dy_noise, self.noise)
-            dtheta_noise = max(dtheta_noise, 0.001)
-            
+            dx_noise = max(abs(delta_state[0]) * self.noise, self.noise)
+            dy_noise = max(abs(delta_state[1]) * self.noise, self.noise)
+            dtheta_noise = max(abs(delta_state[2]) * self.noise, 0.001)
+
             # Update with noise
-            x = particle.get_state()[0] + delta_state[0] + random.gauss(0, dx_noise)
-            y = particle.get_state()[1] + delta_state[1] + random.gauss(0, dy_noise)
-            theta = particle.get_state()[2] + delta_state[2] + random.gauss(0, dtheta_noise)
+            x = particles.x + delta_state[0] + self.rng.normal(0, dx_noise, n)
+            y = particles.y + delta_state[1] + self.rng.normal(0, dy_noise, n)
+            theta = particles.theta + delta_state[2] + self.rng.normal(0, dtheta_noise, n)
 
             # Ensure the particle stays within bounds
-            x = max(0, min(x, self.box_size[0]))
-            y = max(0, min(y,
-             self.box_size[1]))
-            
+            np.clip(x, 0, self.box_size[0], out=particles.x)
+            np.clip(y, 0, self.box_size[1], out=particles.y)
+
             # Normalize theta to be between -π and π
-            while theta > math.pi:
-                theta -= 2 * math.pi
-            while theta < -math.pi:
-                theta += 2 * math.pi
-                
-            particle.set_state([x, y, theta])
+            particles.theta[:] = (theta + math.pi) % (2 * math.pi) - math.pi
+            self.stage_seconds["update"] = time.perf_counter() - start
 
     def set_noise(self, noise):
         self.noise = noise
 
-    def confidence(self, particle, sensor_offset):
-        """Correct the particles based on the measurement"""
-        robot_particle = Particle(self.robot_location, 1.0)
-        mock_particle = Particle(particle.get_state(), 1.0)
-
-        # Offset states by sensor offset
-        mock_particle.set_state([
-            mock_particle.get_state()[0] + sensor_offset[0],
-            mock_particle.get_state()[1] + sensor_offset[1],
-            mock_particle.get_state()[2] + sensor_offset[2]
-        ])
-
-        robot_particle.set_state([
-            robot_particle.get_state()[0] + sensor_offset[0],
-            robot_particle.get_state()[1] + sensor_offset[1],
-            robot_particle.get_state()[2] + sensor_offset[2]
-        ])
-
-        predicted = self.field_model.get_distance_to_obstacle(mock_particle)
-        
-        actual = self.field_model.get_distance_to_obstacle(robot_particle)
-
-
-        sigma = 7.0  # Goofy sigma
-        diff = predicted - actual
-
-        return math.exp(-(diff * diff) / (2 * sigma * sigma))
-        
-    def reweight(self):
-        for particle in self.particles:
-            weight = 0.0
-            
-            for i in range(4):
-                # 4 dist sensors
-                sensor_offset = [0, 0, i * math.pi / 2]
-                
-                sensor_weight = self.confidence(particle, sensor_offset)
-
-
-                if weight == 0.0:
-                    weight = sensor_weight
-                else:
-                    weight *= sensor_weight
+    def set_range_table(self, range_table):
+        """Use a precomputed RangeTable for particle ranges (None to ray cast live)"""
+        self.range_table = range_table
+        if self.backend is not None:
+            self.backend.restart()
+
+    def expected_ranges(self, x, y, headings):
+        """Expected sensor ranges from the range table if set, else live ray casting"""
+        if self.range_table is not None:
+            return self.range_table.lookup(x, y, headings)
+        return self.field_model.cast_rays(x, y, headings)
+
+    def set_sensor_layout(self, sensor_offsets):
+        """
+        Set the distance sensor layout
+
+        Args:
+            sensor_offsets: Sequence of (dx, dy, dtheta) per sensor in the robot frame
+        """
+        self.sensor_offsets = np.asarray(sensor_offsets, dtype=float).reshape(-1, 3)
+
+    def set_sigma(self, sigma):
+        """Set the standard deviation of the range sensor model"""
+        self.sigma = sigma
+        # The likelihood field bakes sigma into its table
+        if self.likelihood_field is not None:
+            self.likelihood_field = self.likelihood_field.with_sigma(sigma)
+            if self.backend is not None and self.sensor_model == "likelihood_field":
+                self.backend.restart()
+
+    def sensor_rays(self, x, y, theta):
+        """
+        Ray origins and headings of every sensor for the given poses
+
+        Args:
+            x, y, theta: Pose arrays, shape (N,)
+
+        Returns:
+            Tuple of (N, S) arrays (ray_x, ray_y, ray_heading)
+        """
+        x = np.asarray(x, dtype=float)[:, None]
+        y = np.asarray(y, dtype=float)[:, None]
+        theta = np.asarray(theta, dtype=float)[:, None]
+        dx, dy, dtheta = self.sensor_offsets.T
+
+        # Rotate the mounting offsets from the robot frame into the field frame
+        cos_t = np.cos(theta)
+        sin_t = np.sin(theta)
+        ray_x = x + dx * cos_t - dy * sin_t
+        ray_y = y + dx * sin_t + dy * cos_t
+        return ray_x, ray_y, theta + dtheta
+
+    def measure(self, pose=None):
+        """
+        Simulate the sensor readings at a pose (defaults to the robot location)
+
+        Returns:
+            (S,) array of ranges, np.inf where a sensor sees nothing
+        """
+        if pose is None:
+            pose = self.robot_location
+        ray_x, ray_y, headings = self.sensor_rays([pose[0]], [pose[1]], [pose[2]])
+        return self.field_model.cast_rays(ray_x, ray_y, headings)[0]
+
+    def set_sensor_model(self, sensor_model, likelihood_field=None):
+        """
+        Choose how particles are scored against the measurements
+
+        Args:
+            sensor_model: "raycast" (compare ray cast ranges) or "likelihood_field"
+                (look up each beam endpoint in a precomputed distance field)
+            likelihood_field: LikelihoodField to use, built from the field model
+                with the current sigma when None
+        """
+        if sensor_model == "likelihood_field":
+            if likelihood_field is None:
+                likelihood_field = LikelihoodField(self.field_model, sigma=self.sigma)
+            self.likelihood_field = likelihood_field
+        elif sensor_model != "raycast":
+            raise ValueError(f"Unknown sensor model: {sensor_model}")
+        self.sensor_model = sensor_model
+        if self.backend is not None:
+            self.backend.restart()
+
+    def log_confidence(self, predicted, actual):
+        """Gaussian log-likelihood of the predicted sensor ranges given the actual reading"""
+        sigma = self.sigma
+        with np.errstate(invalid="ignore"):
+            diff = predicted - actual
+        # Both rays missing every wall agree perfectly
+        diff = np.where(np.isinf(predicted) & np.isinf(actual), 0.0, diff)
+
+        log_likelihood = -(diff * diff) / (2 * sigma * sigma)
+        # Invalid (NaN) readings carry no information
+        return np.where(np.isnan(actual), 0.0, log_likelihood)
+
+    def confidence(self, predicted, actual):
+        """Gaussian likelihood of the predicted sensor ranges given the actual reading"""
+        return np.exp(self.log_confidence(predicted, actual))
+
+    def log_likelihood_at(self, x, y, theta, measurements):
+        """
+        Unnormalized log-likelihood of the measurements at each pose
+
+        Args:
+            x, y, theta: Pose arrays, shape (N,)
+            measurements: Ranges, shape (S,) or (N, S)
+
+        Returns:
+            (N,) array of log-likelihoods summed over the sensors
+        """
+        with PROFILER.stage("confidence", len(x)):
+            actual = np.asarray(measurements, dtype=float)
+            if actual.ndim == 1:
+                actual = actual[None, :]
+            ray_x, ray_y, headings = self.sensor_rays(x, y, theta)
+
+            if self.sensor_model == "likelihood_field":
+                # Project each beam's endpoint and look it up; beams with no return are skipped
+                valid = np.isfinite(actual)
+                ranges = np.where(valid, actual, 0.0)
+                end_x = ray_x + ranges * np.cos(headings)
+                end_y = ray_y + ranges * np.sin(headings)
+                return np.where(valid, self.likelihood_field.lookup(end_x, end_y), 0.0).sum(axis=1)
+
+            predicted = self.expected_ranges(ray_x, ray_y, headings)
+            return self.log_confidence(predicted, actual).sum(axis=1)
+
+    def log_likelihood(self, measurements):
+        """Unnormalized log-likelihood of the measurements for every particle"""
+        particles = self.particles
+        return self.log_likelihood_at(particles.x, particles.y, particles.theta, measurements)
+
+    def reweight(self, measurements=None):
+        """
+        Weight the particles by how well they explain the sensor readings
 
-            particle.set_weight(weight)
+        Weights are accumulated in log space so they don't underflow when the
+        particles are far from the robot.
 
-        
-        # Normalize weights to prevent numerical issues
-        total_weight = sum(p.get_weight() for p in self.particles)
-        if total_weight > 0:
-            for particle in self.particles:
-                particle.set_weight(particle.get_weight() / total_weight)
+        Args:
+            measurements: (S,) ranges matching the sensor layout, simulated from
+                the robot location when None
+        """
+        with PROFILER.stage("reweight", len(self.particles)):
+            start = time.perf_counter()
+            particles = self.particles
 
-        else: # uh oh
-            for particle in self.particles:
-                particle.set_weight(1.0 / len(self.particles))
-        
+            if measurements is None:
+                measurements = self.measure()
+
+            # Particles keep their weight between resamples, so the new evidence multiplies in
+            with np.errstate(divide="ignore"):
+                log_prior = np.log(particles.weight)
+
+            if self.backend is not None:
+                # Workers write the log-likelihoods straight into the shared weight array
+                self.backend.log_likelihood(measurements)
+                log_weights = particles.weight + log_prior
+            else:
+                log_weights = self.log_likelihood(measurements) + log_prior
+
+            # Normalize weights to prevent numerical issues
+            peak = log_weights.max() if len(log_weights) else -np.inf
+            if np.isfinite(peak):
+                weights = np.exp(log_weights - peak)
+                particles.weight[:] = weights / weights.sum()
+
+            else: # uh oh
+                particles.weight[:] = 1.0 / len(particles)
+            self.stage_seconds["reweight"] = time.perf_counter() - start
+
+    def set_adaptive(self, enabled, bin_size=None, epsilon=None, delta=None, min_particles=None, max_particles=None):
+        """
+        Enable or disable KLD-sampling of the particle count in resample
+
+        Args:
+            enabled: Whether resample picks the particle count adaptively
+            bin_size: Histogram bin size as (x, y, theta)
+            epsilon: Bound on the KL divergence between sample and true posterior
+            delta: Probability that the bound is exceeded
+            min_particles: Lower limit on the particle count
+            max_particles: Upper limit on the particle count
+        """
+        self.adaptive = enabled
+        if bin_size is not None:
+            self.kld_bin_size = tuple(bin_size)
+        if epsilon is not None:
+            self.kld_epsilon = epsilon
+        if delta is not None:
+            self.kld_delta = delta
+        if min_particles is not None:
+            self.min_particles = min_particles
+        if max_particles is not None:
+            self.max_particles = max_particles
+
+    def kld_bound(self, k):
+        """Number of particles needed for k occupied bins (Fox 2003, Wilson-Hilferty approximation)"""
+        k = np.asarray(k, dtype=float)
+        z = NormalDist().inv_cdf(1.0 - self.kld_delta)
+        km1 = np.maximum(k - 1, 1)
+        a = 2.0 / (9.0 * km1)
+        bound = km1 / (2.0 * self.kld_epsilon) * (1.0 - a + np.sqrt(a) * z) ** 3
+        return np.where(k > 1, bound, 0.0)
+
+    def _kld_indices(self, weights):
+        """Draw from the posterior until the KLD bound for the occupied bins is met"""
+        particles = self.particles
+        max_n = self.max_particles
+
+        # Candidates are copies of current particles, so bin the current set once
+        bx = np.floor(particles.x / self.kld_bin_size[0]).astype(np.int64)
+        by = np.floor(particles.y / self.kld_bin_size[1]).astype(np.int64)
+        bt = np.floor((particles.theta + math.pi) / self.kld_bin_size[2]).astype(np.int64)
+        bx -= bx.min()
+        by -= by.min()
+        bt -= bt.min()
+        keys = (bx * (by.max() + 1) + by) * (bt.max() + 1) + bt
+        _, particle_bins = np.unique(keys, return_inverse=True)
+        seen = np.zeros(particle_bins.max() + 1, dtype=bool)
+
+        # Draw in doubling chunks and stop at the first one where the bound is met,
+        # so the cost tracks the particle count that gets picked
+        chunks = []
+        drawn = 0
+        occupied_so_far = 0
+        chunk_size = min(max(self.min_particles, 1), max_n)
+        while True:
+            candidates = multinomial(weights, chunk_size, self.rng)
+            bins = particle_bins[candidates]
+
+            # First occurrence in the chunk of each bin nothing earlier landed in
+            unique_bins, first = np.unique(bins, return_index=True)
+            fresh = ~seen[unique_bins]
+            seen[unique_bins] = True
+            new_bin = np.zeros(chunk_size, dtype=bool)
+            new_bin[first[fresh]] = True
+            occupied = occupied_so_far + np.cumsum(new_bin)
+
+            count = drawn + np.arange(1, chunk_size + 1)
+            done = (count >= self.kld_bound(occupied)) & (count >= self.min_particles)
+            if done.any() or drawn + chunk_size >= max_n:
+                stop = int(np.argmax(done)) + 1 if done.any() else chunk_size
+                chunks.append(candidates[:stop])
+                return np.concatenate(chunks), int(occupied[stop - 1])
+
+            chunks.append(candidates)
+            drawn += chunk_size
+            occupied_so_far = int(occupied[-1])
+            chunk_size = min(drawn, max_n - drawn)
+
+    def set_resampler(self, resampler, threshold=None, jitter=None):
+        """
+        Configure resampling
+
+        Args:
+            resampler: "systematic", "stratified", "residual" or "multinomial"
+            threshold: Resample only when the effective sample size drops below
+                this fraction of the particle count (1.0 resamples every tick)
+            jitter: (x, y, theta) standard deviations of the noise added to resampled particles
+        """
+        if resampler not in RESAMPLERS:
+            raise ValueError(f"Unknown resampler: {resampler}")
+        self.resampler = resampler
+        if threshold is not None:
+            self.resample_threshold = threshold
+        if jitter is not None:
+            self.resample_jitter = tuple(jitter)
+
+    def effective_sample_size(self):
+        weights = self.particles.weight
+        return 1.0 / np.dot(weights, weights)
 
     def resample(self):
-        """Resample particles with low variance sampler to prevent particle depletion"""
-        weights = [particle.get_weight() for particle in self.particles]
-        
-        sum_weights_squared = sum(w*w for w in weights)
-        neff = 1.0 / sum_weights_squared
-
-        # Disabled selective resampling, always resample rn, works well
-        
-        if neff < self.num_particles * 1.0:  # set threshold to less than 1.0 for selecitive resampling
-            new_particles = []
-            
-            # Low variance resampler
-            r = random.uniform(0, 1.0 / self.num_particles)
-            c = weights[0]
-            i = 0
-            
-            for m in range(self.num_particles):
-                u = r + m / self.num_particles
-                while u > c:
-                    i += 1
-                    c += weights[i]
-                
+        """Resample particles when the effective sample size says the weights have degenerated"""
+        with PROFILER.stage("resample", len(self.particles)):
+            start = time.perf_counter()
+            particles = self.particles
+            weights = particles.weight
+
+            neff = self.effective_sample_size()
+
+            resampled = neff < len(particles) * self.resample_threshold
+            if resampled:
+                if self.adaptive:
+                    indices, occupied_bins = self._kld_indices(weights)
+                    n = len(indices)
+                else:
+                    n = self.num_particles
+                    indices = RESAMPLERS[self.resampler](weights, n, self.rng)
+
+                particles.take(indices)
+                self.num_particles = n
+
                 # noiseee
-                x, y, theta = self.particles[i].get_state()
-                x += random.gauss(0, 0.05)
-                y += random.gauss(0, 0.05)
-                theta += random.gauss(0, 0.01)
-
-                new_particles.append(Particle([x, y, theta], 1.0 / self.num_particles))
-            
-            self.particles = new_particles
+                jitter_x, jitter_y, jitter_theta = self.resample_jitter
+                particles.x += self.rng.normal(0, jitter_x, n)
+                particles.y += self.rng.normal(0, jitter_y, n)
+                particles.theta += self.rng.normal(0, jitter_theta, n)
+                particles.weight[:] = 1.0 / n
+            else:
+
+                particles.weight /= weights.sum()
+            self.stage_seconds["resample"] = time.perf_counter() - start
+
+            if self.adaptive and resampled:
+                self.kld_stats = {
+                    "num_particles": self.num_particles,
+                    "occupied_bins": occupied_bins,
+                    "tick_seconds": sum(self.stage_seconds.values()),
+                }
+
+    def resize(self, num_particles):
+        """
+        Change the particle count without throwing away the current belief
+
+        Growing appends particles drawn from the weighted posterior (the old and
+        new particles are then mixed in proportion to their counts); shrinking
+        keeps a weighted subsample. Either way the set is resized in place, it
+        only reallocates when growing past its capacity.
+        """
+        particles = self.particles
+        old = len(particles)
+        if num_particles == old:
+            return
+        weights = particles.weight / particles.weight.sum()
+
+        if num_particles > old:
+            extra = num_particles - old
+            indices = RESAMPLERS[self.resampler](weights, extra, self.rng)
+            particles.resize(num_particles)
+            buffer = particles.buffer
+            buffer[:3, old:num_particles] = buffer[:3, indices]
+            # New particles are always copies, so they all get jitter
+            jitter_x, jitter_y, jitter_theta = self.resample_jitter
+            particles.x[old:] += self.rng.normal(0, jitter_x, extra)
+            particles.y[old:] += self.rng.normal(0, jitter_y, extra)
+            particles.theta[old:] += self.rng.normal(0, jitter_theta, extra)
+            particles.weight[:old] = weights * (old / num_particles)
+            particles.weight[old:] = 1.0 / num_particles
         else:
+            indices = np.sort(RESAMPLERS[self.resampler](weights, num_particles, self.rng))
+            particles.take(indices)
+            # Only jitter the repeats, the first copy of each particle stays put
+            repeats = np.flatnonzero(indices[1:] == indices[:-1]) + 1
+            jitter_x, jitter_y, jitter_theta = self.resample_jitter
+            particles.x[repeats] += self.rng.normal(0, jitter_x, len(repeats))
+            particles.y[repeats] += self.rng.normal(0, jitter_y, len(repeats))
+            particles.theta[repeats] += self.rng.normal(0, jitter_theta, len(repeats))
+            particles.weight[:] = 1.0 / num_particles
 
-            for particle in self.particles:
-                particle.set_weight(particle.get_weight() / sum(weights))
+        self.num_particles = num_particles
 
     def get_estimated_state(self):
-        """Estimate the state based on the particles"""
-        x_sum = 0
-        y_sum = 0
-        theta_sum = 0
-
-        for particle in self.particles:
-            x, y, theta = particle.get_state()
-            x_sum += x
-            y_sum += y
-            theta_sum += theta
-
-        num_particles = len(self.particles)
-        return (x_sum / num_particles, y_sum / num_particles, theta_sum / num_particles)
+        """Estimate the state based on the particles (weighted mean, circular mean for theta)"""
+        return self.get_pose_estimate().mean
+
+    def get_pose_estimate(self):
+        """Weighted mean pose and its 3x3 covariance"""
+        particles = self.particles
+        return estimate_pose(particles.x, particles.y, particles.theta, particles.weight)
+
+    def get_clusters(self, k=3, cell_size=6.0):
+        """Top-k modes of the particle distribution with the fraction of weight in each"""
+        particles = self.particles
+        return extract_clusters(particles.x, particles.y, particles.theta, particles.weight, cell_size, k)
     
+    def worker_config(self):
+        """Plain filter settings the parallel workers need to mirror this filter"""
+        return {
+            "box_size": self.box_size,
+            "noise": self.noise,
+            "sensor_offsets": self.sensor_offsets,
+            "sigma": self.sigma,
+            "sensor_model": self.sensor_model,
+        }
+
+    def get_settings(self):
+        """Tunable filter settings as plain JSON-friendly values (see apply_settings)"""
+        return {
+            "noise": self.noise,
+            "sigma": self.sigma,
+            "sensor_offsets": self.sensor_offsets.tolist(),
+            "sensor_model": self.sensor_model,
+            "resampler": self.resampler,
+            "resample_threshold": self.resample_threshold,
+            "resample_jitter": list(self.resample_jitter),
+            "adaptive": self.adaptive,
+            "kld_bin_size": list(self.kld_bin_size),
+            "kld_epsilon": self.kld_epsilon,
+            "kld_delta": self.kld_delta,
+            "min_particles": self.min_particles,
+            "max_particles": self.max_particles,
+        }
+
+    def apply_settings(self, settings):
+        """Restore settings captured by get_settings"""
+        self.set_noise(settings["noise"])
+        self.set_sensor_layout(settings["sensor_offsets"])
+        if settings["sigma"] != self.sigma:
+            self.set_sigma(settings["sigma"])
+        if settings["sensor_model"] != self.sensor_model:
+            self.set_sensor_model(settings["sensor_model"])
+        self.set_resampler(settings["resampler"], settings["resample_threshold"], settings["resample_jitter"])
+        self.set_adaptive(settings["adaptive"], settings["kld_bin_size"], settings["kld_epsilon"],
+                          settings["kld_delta"], settings["min_particles"], settings["max_particles"])
+
+    def close(self):
+        """Release the parallel backend's worker processes and shared memory"""
+        if self.backend is not None:
+            self.backend.close()
+            self.backend = None
+
     def set_robot_location(self, robot_loc):
-        self.robot_location = robot_loc
\ No newline at end of file
+        self.robot_location = robot_loc
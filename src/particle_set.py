@@ -0,0 +1,118 @@
+import numpy as np
+
+
+class ParticleView:
+    """Particle-like view onto a single slot of a ParticleSet"""
+    __slots__ = ("particle_set", "index")
+
+    def __init__(self, particle_set, index):
+        self.particle_set = particle_set
+        self.index = index
+
+    def get_state(self):
+        ps = self.particle_set
+        i = self.index
+        return (float(ps.x[i]), float(ps.y[i]), float(ps.theta[i]))
+
+    def get_weight(self):
+        return float(self.particle_set.weight[self.index])
+
+    def set_state(self, state):
+        ps = self.particle_set
+        i = self.index
+        ps.x[i], ps.y[i], ps.theta[i] = state
+
+    def set_weight(self, weight):
+        self.particle_set.weight[self.index] = weight
+
+    def __repr__(self):
+        return f"Particle(state={self.get_state()}, weight={self.get_weight()})"
+
+
+def allocate_buffer(capacity):
+    """Default ParticleSet storage: a (4, capacity) array of x, y, theta, weight rows"""
+    return np.zeros((4, capacity))
+
+
+class ParticleSet:
+    """Structure-of-arrays particle storage (contiguous x, y, theta and weight arrays)"""
+
+    def __init__(self, num_particles, capacity=None, allocate=None):
+        """
+        Args:
+            num_particles: Number of particles in the set
+            capacity: Number of slots to reserve up front (at least num_particles)
+            allocate: Callable(capacity) returning a (4, capacity) float64 buffer,
+                e.g. backed by shared memory
+        """
+        self.allocate = allocate or allocate_buffer
+        self._buffer = self.allocate(max(capacity or 0, num_particles, 1))
+        self._set_count(num_particles)
+        self.weight[:] = 1.0 / max(num_particles, 1)
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        """Wrap an existing (4, N) buffer (e.g. one shard of a shared set) without copying"""
+        particle_set = cls.__new__(cls)
+        particle_set.allocate = None
+        particle_set._buffer = buffer
+        particle_set._set_count(buffer.shape[1])
+        return particle_set
+
+    @property
+    def capacity(self):
+        return self._buffer.shape[1]
+
+    @property
+    def buffer(self):
+        return self._buffer
+
+    def _set_count(self, count):
+        self.count = count
+        self.x = self._buffer[0, :count]
+        self.y = self._buffer[1, :count]
+        self.theta = self._buffer[2, :count]
+        self.weight = self._buffer[3, :count]
+
+    def _reserve(self, count, keep):
+        """Make room for count particles, keeping the first keep slots"""
+        if count <= self.capacity:
+            return
+        buffer = self.allocate(max(count, 2 * self.capacity))
+        buffer[:, :keep] = self._buffer[:, :keep]
+        self._buffer = buffer
+
+    def resize(self, count):
+        """Change the particle count keeping the first min(count, len) particles"""
+        self._reserve(count, min(count, self.count))
+        self._set_count(count)
+
+    def reset(self, count):
+        """Change the particle count without preserving any particle data"""
+        self._reserve(count, 0)
+        self._set_count(count)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("particle index out of range")
+        return ParticleView(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield ParticleView(self, i)
+
+    def states(self):
+        """Return the particle states as an (N, 3) array"""
+        return np.column_stack((self.x, self.y, self.theta))
+
+    def take(self, indices):
+        """Replace the set with the particles at the given indices (in place)"""
+        gathered = self._buffer[:, :self.count][:, indices]
+        self._reserve(len(indices), 0)
+        self._buffer[:, :len(indices)] = gathered
+        self._set_count(len(indices))
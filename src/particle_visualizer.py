@@ -1,10 +1,18 @@
-from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QSlider, QSizePolicy
+from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QSlider, QSizePolicy, QCheckBox, QPushButton
 from PyQt6.QtCore import Qt, QTimer
 from particle_filter import ParticleFilter
+from filter_worker import FilterWorker
 from visualization_widget import VisualizationWidget
+from profiler import PROFILER
+import time
+
+# Quiet period after the last particle slider change before the filter is resized
+PARTICLE_COUNT_DEBOUNCE_MS = 250
 
 class ParticleVisualizer(QMainWindow):
-    def __init__(self, box_size_inches, num_particles=500, initial_state=(72, 72, 0)):
+    def __init__(self, box_size_inches, num_particles=500, initial_state=(72, 72, 0), backend="serial",
+                 filter_rate=10.0, frame_rate=30.0, recorder=None, replayer=None, replay_seek=None,
+                 scheduler=None):
         """
         Initialize the particle filter visualizer
         
@@ -12,11 +20,19 @@ class ParticleVisualizer(QMainWindow):
             box_size_inches: Size of the simulation box in inches as a tuple (width, height)
             num_particles: Number of particles to use
             initial_state: Initial state as a tuple (x, y, theta)
+            backend: Particle filter backend, "serial" or "parallel"
+            filter_rate: Filter ticks per second (runs on a worker thread)
+            frame_rate: Repaints per second
+            recorder: Optional LogRecorder to log every filter tick to
+            replayer: Optional LogReplayer to drive the filter from instead of the mouse
+            replay_seek: Tick to seek the replay to before starting
+            scheduler: Optional UpdateScheduler deciding when the worker runs an update
         """
         super().__init__()
         
         # Store parameters
         self.box_size_inches = box_size_inches
+        self.backend = backend
         self.pixels_per_inch = 5  # Conversion factor from inches to pixels
         
         # Calculate box size in pixels
@@ -25,8 +41,14 @@ class ParticleVisualizer(QMainWindow):
             int(box_size_inches[1] * self.pixels_per_inch)
         )
         
-        # Initialize particle filter
-        self.particle_filter = ParticleFilter(num_particles, box_size_inches, list(initial_state))
+        # Initialize particle filter, owned by the worker thread from here on
+        particle_filter = ParticleFilter(num_particles, box_size_inches, list(initial_state), backend=backend)
+        self.replayer = replayer
+        self.worker = FilterWorker(particle_filter, filter_rate, recorder=recorder, replayer=replayer,
+                                   scheduler=scheduler)
+        if replayer is not None and replay_seek is not None:
+            self.worker.replay_index = replayer.seek(particle_filter, replay_seek)
+        self.worker.start()
         
         # Variables for dragging
         self.dragging = False
@@ -42,9 +64,25 @@ class ParticleVisualizer(QMainWindow):
         # Setup UI
         self.init_ui()
 
+        # Frame timer only feeds odometry and repaints, the filter runs at its own rate
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.update_filter)
-        self.timer.start(100)  # 20 milliseconds = 50 fps
+        self.set_frame_rate(frame_rate)
+
+    def set_frame_rate(self, frame_rate):
+        """Set the repaint rate in frames per second"""
+        self.timer.start(int(1000 / frame_rate))
+
+    def set_filter_rate(self, filter_rate):
+        """Set the filter tick rate in ticks per second"""
+        self.worker.set_filter_rate(filter_rate)
+
+    def closeEvent(self, event):
+        """Stop the filter worker with the window"""
+        self.timer.stop()
+        self.worker.stop()
+        self.worker.particle_filter.close()
+        super().closeEvent(event)
     
     def init_ui(self):
         """Initialize the user interface"""
@@ -107,6 +145,12 @@ class ParticleVisualizer(QMainWindow):
         self.particle_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
         self.particle_slider.setTickInterval(50)
         self.particle_slider.valueChanged.connect(self.update_particle_count)
+
+        # Dragging fires valueChanged constantly, so wait for the slider to settle
+        self.particle_count_timer = QTimer(self)
+        self.particle_count_timer.setSingleShot(True)
+        self.particle_count_timer.setInterval(PARTICLE_COUNT_DEBOUNCE_MS)
+        self.particle_count_timer.timeout.connect(self.apply_particle_count)
         particle_layout.addWidget(particle_label)
         particle_layout.addWidget(self.particle_slider)
         
@@ -114,6 +158,18 @@ class ParticleVisualizer(QMainWindow):
         first_row.addLayout(particle_layout)
         
         controls_layout.addLayout(first_row)
+
+        # Second row: profiling
+        second_row = QHBoxLayout()
+        self.profiler_checkbox = QCheckBox("Show profiler")
+        self.profiler_checkbox.toggled.connect(self.toggle_profiler)
+        dump_button = QPushButton("Dump stats")
+        dump_button.clicked.connect(self.dump_profiler_stats)
+        second_row.addWidget(self.profiler_checkbox)
+        second_row.addWidget(dump_button)
+        second_row.addStretch()
+
+        controls_layout.addLayout(second_row)
         
         main_layout.addWidget(controls_container)
         
@@ -129,17 +185,32 @@ class ParticleVisualizer(QMainWindow):
         self.show()
     
     def update_particle_count(self, value):
-        """Update the number of particles"""
-        noise_value = self.noise_slider.value() / 100.0
-        self.particle_filter = ParticleFilter(value, 
-                                             self.box_size_inches, 
-                                             list(self.robot_pos_inches) + [self.robot_theta])
-        self.particle_filter.set_noise(noise_value)
+        """Restart the debounce timer, only the value the slider settles on gets applied"""
+        self.particle_count_timer.start()
+
+    def apply_particle_count(self):
+        """Resize the particle set in place, keeping the current belief"""
+        value = self.particle_slider.value()
+        self.worker.submit(lambda particle_filter: particle_filter.resize(value))
+        self.vis_widget.update()
+
+    def toggle_profiler(self, checked):
+        """Turn the instrumentation and its overlay on or off"""
+        PROFILER.enable(checked)
+        if checked:
+            PROFILER.reset()
+        self.vis_widget.show_profiler = checked
         self.vis_widget.update()
 
+    def dump_profiler_stats(self):
+        """Write the profiler stats to timestamped JSON and CSV files in the working directory"""
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        PROFILER.dump_json(f"profile-{stamp}.json")
+        PROFILER.dump_csv(f"profile-{stamp}.csv")
+
     def update_noise_value(self, value):
         """Update the number of particles"""
-        self.particle_filter.set_noise(value / 100.0)
+        self.worker.submit(lambda particle_filter: particle_filter.set_noise(value / 100.0))
         self.vis_widget.update()
     
     def update_robot_position(self, new_pos_pixels):
@@ -160,17 +231,21 @@ class ParticleVisualizer(QMainWindow):
         self.vis_widget.update()
 
     def update_filter(self):
+        """Hand the odometry since the last frame to the filter worker and repaint"""
+        if self.replayer is not None:
+            # The log drives the filter, just follow the logged robot location
+            snapshot = self.worker.latest()
+            if snapshot is not None and snapshot.robot_location is not None:
+                self.robot_pos_inches = snapshot.robot_location[:2]
+                self.robot_theta = snapshot.robot_location[2]
+            self.vis_widget.update()
+            return
+
         dx = self.robot_pos_inches[0] - self.last_update_pos[0]
         dy = self.robot_pos_inches[1] - self.last_update_pos[1]
         self.last_update_pos = (self.robot_pos_inches[0], self.robot_pos_inches[1])
 
-        # Update the particle filter
-        self.particle_filter.set_robot_location([self.robot_pos_inches[0], self.robot_pos_inches[1], 0])
-        
-        self.particle_filter.update((dx, dy, 0))
-
-        self.particle_filter.reweight()
-
-        self.particle_filter.resample()
+        # The worker coalesces everything queued between its ticks
+        self.worker.submit_odometry((dx, dy, 0), (self.robot_pos_inches[0], self.robot_pos_inches[1], 0))
 
         self.vis_widget.update()
\ No newline at end of file
@@ -0,0 +1,121 @@
+import math
+from typing import NamedTuple, Tuple
+import numpy as np
+
+
+class PoseEstimate(NamedTuple):
+    """Weighted mean pose (circular heading mean) and its 3x3 (x, y, theta) covariance"""
+    mean: Tuple[float, float, float]
+    covariance: np.ndarray
+
+
+class Cluster(NamedTuple):
+    """One mode of the particle distribution and the fraction of weight it holds"""
+    mean: Tuple[float, float, float]
+    mass: float
+
+
+def estimate_pose(x, y, theta, weights=None):
+    """
+    Weighted mean and covariance in a single pass over the particles
+
+    All first and second moments of (x, y, cos θ, sin θ) come out of one
+    weighted matrix product. The heading residual is sin(θ - mean), which is
+    linear in cos θ and sin θ, so its moments follow from the same products.
+
+    Args:
+        x, y, theta: Particle state arrays, shape (N,)
+        weights: Particle weights (uniform when None)
+
+    Returns:
+        PoseEstimate
+    """
+    x = np.asarray(x, dtype=float)
+    if weights is None:
+        weights = np.full(len(x), 1.0 / max(len(x), 1))
+    weights = np.asarray(weights, dtype=float)
+
+    features = np.column_stack((np.ones_like(x), x, y, np.cos(theta), np.sin(theta)))
+    moments = (features * weights[:, None]).T @ features
+    moments /= moments[0, 0]
+
+    mx, my, mc, ms = moments[0, 1:]
+    mean_theta = math.atan2(ms, mc)
+    cos_t = math.cos(mean_theta)
+    sin_t = math.sin(mean_theta)
+
+    # Projection of (1, x, y, cos θ, sin θ) onto centered x, y and sin(θ - mean)
+    projection = np.array([
+        [-mx, 1.0, 0.0, 0.0, 0.0],
+        [-my, 0.0, 1.0, 0.0, 0.0],
+        [0.0, 0.0, 0.0, -sin_t, cos_t],
+    ])
+    covariance = projection @ moments @ projection.T
+
+    return PoseEstimate((float(mx), float(my), mean_theta), covariance)
+
+
+def _neighborhood_sum(grid):
+    """Sum over each cell's 3x3 neighborhood"""
+    padded = np.pad(grid, 1)
+    nx, ny = grid.shape
+    return sum(padded[i:i + nx, j:j + ny] for i in range(3) for j in range(3))
+
+
+def extract_clusters(x, y, theta, weights=None, cell_size=6.0, k=3):
+    """
+    Top-k modes of the particle distribution by grid binning
+
+    Particle weight is binned on an x/y grid and summed over 3x3
+    neighborhoods. The heaviest neighborhood becomes a cluster and its cells
+    are removed before the next one is picked, so the masses sum to at most 1.
+
+    Args:
+        x, y, theta: Particle state arrays, shape (N,)
+        weights: Particle weights (uniform when None)
+        cell_size: Grid cell size in inches
+        k: Maximum number of clusters
+
+    Returns:
+        List of Cluster, heaviest first
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) == 0:
+        return []
+    if weights is None:
+        weights = np.ones(len(x))
+    weights = np.asarray(weights, dtype=float)
+
+    min_x, min_y = x.min(), y.min()
+    ix = ((x - min_x) // cell_size).astype(np.intp)
+    iy = ((y - min_y) // cell_size).astype(np.intp)
+    nx, ny = ix.max() + 1, iy.max() + 1
+    cells = ix * ny + iy
+
+    def binned(values):
+        return np.bincount(cells, values, nx * ny).reshape(nx, ny)
+
+    # Raw per-cell sums of weight, weighted x/y and weighted heading vector
+    grids = np.stack([binned(weights), binned(weights * x), binned(weights * y),
+                      binned(weights * np.cos(theta)), binned(weights * np.sin(theta))])
+    total = weights.sum()
+
+    # Greedily take the heaviest 3x3 neighborhood and remove its cells before
+    # looking for the next one, so clusters never share weight (argmax breaks
+    # ties towards the first cell)
+    clusters = []
+    for _ in range(k):
+        mass = _neighborhood_sum(grids[0])
+        peak = int(np.argmax(mass))
+        if mass.flat[peak] <= 0:
+            break
+        i, j = divmod(peak, ny)
+        window = grids[:, max(i - 1, 0):i + 2, max(j - 1, 0):j + 2]
+        cluster_mass, sum_x, sum_y, sum_c, sum_s = window.sum(axis=(1, 2))
+        window[:] = 0.0
+        clusters.append(Cluster(
+            (float(sum_x / cluster_mass), float(sum_y / cluster_mass), math.atan2(sum_s, sum_c)),
+            float(cluster_mass / total),
+        ))
+    return clusters
@@ -0,0 +1,182 @@
+import csv
+import json
+import math
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+# Histogram buckets: 4 per decade from 1 µs to 10 s
+BUCKETS_PER_DECADE = 4
+MIN_SECONDS = 1e-6
+NUM_BUCKETS = 7 * BUCKETS_PER_DECADE + 1
+
+_DISABLED = nullcontext()
+
+
+def bucket_edges():
+    """Lower edge of every histogram bucket in seconds"""
+    return [MIN_SECONDS * 10 ** (i / BUCKETS_PER_DECADE) for i in range(NUM_BUCKETS)]
+
+
+class StageStats:
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.items = 0
+        self.allocated_blocks = 0
+        self.histogram = [0] * NUM_BUCKETS
+
+    def add(self, seconds, items, allocated_blocks):
+        self.calls += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.items += items
+        self.allocated_blocks += max(allocated_blocks, 0)
+        if seconds > MIN_SECONDS:
+            bucket = int(math.log10(seconds / MIN_SECONDS) * BUCKETS_PER_DECADE)
+        else:
+            bucket = 0
+        self.histogram[min(bucket, NUM_BUCKETS - 1)] += 1
+
+    def percentile(self, q):
+        """Approximate percentile (upper edge of the bucket it falls in)"""
+        if not self.calls:
+            return 0.0
+        target = q / 100.0 * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target:
+                return min(MIN_SECONDS * 10 ** ((bucket + 1) / BUCKETS_PER_DECADE), self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "total_seconds": self.total,
+            "mean_seconds": self.total / self.calls if self.calls else 0.0,
+            "min_seconds": self.min if self.calls else 0.0,
+            "max_seconds": self.max,
+            "p50_seconds": self.percentile(50),
+            "p95_seconds": self.percentile(95),
+            "items": self.items,
+            "items_per_second": self.items / self.total if self.total > 0 else 0.0,
+            "allocated_blocks": self.allocated_blocks,
+            "histogram": list(self.histogram),
+        }
+
+
+class _StageTimer:
+    __slots__ = ("profiler", "name", "items", "start", "blocks")
+
+    def __init__(self, profiler, name, items):
+        self.profiler = profiler
+        self.name = name
+        self.items = items
+
+    def __enter__(self):
+        self.blocks = sys.getallocatedblocks()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        self.profiler.record(self.name, elapsed, self.items, sys.getallocatedblocks() - self.blocks)
+        return False
+
+
+class Profiler:
+    def __init__(self):
+        """
+        Low-overhead per-stage instrumentation, off by default
+
+        Stages record wall time histograms, processed item counts (particles,
+        rays) and net allocated memory blocks; counters track plain totals.
+        """
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.counters = {}
+            self.started = time.perf_counter()
+
+    def stage(self, name, items=0):
+        """Context manager timing one call of a stage (a shared no-op when disabled)"""
+        if not self.enabled:
+            return _DISABLED
+        return _StageTimer(self, name, items)
+
+    def record(self, name, seconds, items=0, allocated_blocks=0):
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.add(seconds, items, allocated_blocks)
+
+    def count(self, name, amount=1):
+        """Add to a plain counter, e.g. rays cast"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def stats(self):
+        """Snapshot of every stage and counter as plain data"""
+        with self._lock:
+            elapsed = time.perf_counter() - self.started
+            return {
+                "elapsed_seconds": elapsed,
+                "bucket_edges_seconds": bucket_edges(),
+                "stages": {name: stats.as_dict() for name, stats in self.stages.items()},
+                "counters": {
+                    name: {"total": total, "per_second": total / elapsed if elapsed > 0 else 0.0}
+                    for name, total in self.counters.items()
+                },
+            }
+
+    def dump_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.stats(), f, indent=2)
+
+    def dump_csv(self, path):
+        """One row per stage (histograms are only in the JSON dump)"""
+        stats = self.stats()
+        columns = [
+            "calls", "total_seconds", "mean_seconds", "min_seconds", "max_seconds",
+            "p50_seconds", "p95_seconds", "items", "items_per_second", "allocated_blocks",
+        ]
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["stage"] + columns)
+            for name, stage in stats["stages"].items():
+                writer.writerow([name] + [stage[column] for column in columns])
+            for name, counter in stats["counters"].items():
+                row = {"items": counter["total"], "items_per_second": counter["per_second"]}
+                writer.writerow([name] + [row.get(column, "") for column in columns])
+
+    def summary_lines(self):
+        """Short human-readable lines for an on-screen overlay"""
+        stats = self.stats()
+        lines = []
+        for name, stage in stats["stages"].items():
+            line = f"{name:<10} {stage['mean_seconds'] * 1e3:7.2f} ms  p95 {stage['p95_seconds'] * 1e3:7.2f} ms"
+            if stage["items"]:
+                line += f"  {stage['items_per_second']:,.0f}/s"
+            lines.append(line)
+        for name, counter in stats["counters"].items():
+            lines.append(f"{name:<10} {counter['per_second']:,.0f}/s")
+        return lines
+
+
+# Shared instance used by the filter, field model and visualizer
+PROFILER = Profiler()
@@ -0,0 +1,138 @@
+import os
+import math
+import hashlib
+import numpy as np
+
+
+def default_cache_dir():
+    """Directory where precomputed range tables are stored"""
+    return os.path.join(os.path.expanduser("~"), ".cache", "mcl")
+
+
+class RangeTable:
+    def __init__(self, field_model, resolution=1.0, theta_bins=180, cache_dir=None):
+        """
+        Precomputed expected-range lookup table over an (x, y, theta) grid
+
+        The table is built once per field geometry and grid, saved as a .npy file
+        and memory-mapped (zero copy) on later loads.
+
+        Args:
+            field_model: FieldModel to ray cast against when building the table
+            resolution: Grid spacing in inches along x and y
+            theta_bins: Number of heading bins covering [0, 2π)
+            cache_dir: Directory for the cached table (defaults to ~/.cache/mcl)
+        """
+        self.resolution = float(resolution)
+        self.theta_bins = int(theta_bins)
+        self.cache_dir = cache_dir or default_cache_dir()
+
+        self.min_x, self.min_y, max_x, max_y = field_model.get_bounds()
+        self.nx = int(math.ceil((max_x - self.min_x) / self.resolution)) + 1
+        self.ny = int(math.ceil((max_y - self.min_y) / self.resolution)) + 1
+
+        # Rays that miss everything are stored as max_range (inf can't be interpolated)
+        self.max_range = 2.0 * math.hypot(max_x - self.min_x, max_y - self.min_y)
+
+        key = hashlib.sha1(
+            f"{field_model.geometry_hash()}:{self.resolution}:{self.theta_bins}".encode()
+        ).hexdigest()
+        self.path = os.path.join(self.cache_dir, f"range_table_{key}.npy")
+
+        if not os.path.exists(self.path):
+            self._build(field_model)
+        self.table = np.load(self.path, mmap_mode="r")
+
+    def __getstate__(self):
+        # Ship the cache path rather than the table so other processes memory-map it too
+        state = self.__dict__.copy()
+        del state["table"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.table = np.load(self.path, mmap_mode="r")
+
+    def _build(self, field_model):
+        """Ray cast every grid cell and heading bin into a new cache file"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        gx = self.min_x + np.arange(self.nx) * self.resolution
+        gy = self.min_y + np.arange(self.ny) * self.resolution
+        xs, ys = np.meshgrid(gx, gy, indexing="ij")
+        xs = xs.ravel()
+        ys = ys.ravel()
+
+        # Write to a temp file first so a half-built table is never picked up
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        table = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.float32, shape=(self.nx, self.ny, self.theta_bins)
+        )
+        for k in range(self.theta_bins):
+            theta = 2 * math.pi * k / self.theta_bins
+            distances = field_model.cast_rays(xs, ys, np.full(len(xs), theta))[:, 0]
+            distances = np.minimum(distances, self.max_range)
+            table[:, :, k] = distances.reshape(self.nx, self.ny)
+        table.flush()
+        del table
+        os.replace(tmp_path, self.path)
+
+    def lookup(self, x, y, headings):
+        """
+        Interpolated expected ranges, same contract as FieldModel.cast_rays
+
+        Args:
+            x: Ray origin x coordinates, shape (N,) or (N, S)
+            y: Ray origin y coordinates, shape (N,) or (N, S)
+            headings: Ray headings in radians, shape (N,) or (N, S)
+
+        Returns:
+            (N, S) array of distances, np.inf where a ray hits nothing
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        headings = np.asarray(headings, dtype=float)
+        if headings.ndim == 1:
+            headings = headings[:, None]
+        if x.ndim == 1:
+            x = x[:, None]
+            y = y[:, None]
+        shape = np.broadcast_shapes(x.shape, y.shape, headings.shape)
+
+        # Bilinear weights in x/y (clamped to the grid)
+        fx = np.clip((x - self.min_x) / self.resolution, 0, self.nx - 1)
+        fy = np.clip((y - self.min_y) / self.resolution, 0, self.ny - 1)
+        ix = np.minimum(fx.astype(np.intp), self.nx - 2)
+        iy = np.minimum(fy.astype(np.intp), self.ny - 2)
+        wx = fx - ix
+        wy = fy - iy
+
+        # Linear weights in theta, wrapping around 2π
+        ft = np.mod(headings, 2 * math.pi) * (self.theta_bins / (2 * math.pi))
+        it0 = ft.astype(np.intp) % self.theta_bins
+        it1 = (it0 + 1) % self.theta_bins
+        wt = ft - np.floor(ft)
+
+        table = self.table
+        # The table is float32, so compare against the sentinel as it was stored
+        sentinel = np.float32(self.max_range)
+        result = np.zeros(shape)
+        partial_miss = np.zeros(shape, dtype=bool)
+        for ox, fxw in ((0, 1 - wx), (1, wx)):
+            for oy, fyw in ((0, 1 - wy), (1, wy)):
+                w = fxw * fyw
+                d0 = table[ix + ox, iy + oy, it0]
+                d1 = table[ix + ox, iy + oy, it1]
+                partial_miss |= (d0 >= sentinel) | (d1 >= sentinel)
+                result += w * ((1 - wt) * d0 + wt * d1)
+
+        # Blending the sentinel with real hits gives a distance that isn't anywhere
+        # on the map, so when any corner is a miss use the nearest sample instead
+        if partial_miss.any():
+            jx = np.broadcast_to(ix + (wx >= 0.5), shape)[partial_miss]
+            jy = np.broadcast_to(iy + (wy >= 0.5), shape)[partial_miss]
+            jt = np.broadcast_to(np.where(wt >= 0.5, it1, it0), shape)[partial_miss]
+            nearest = table[jx, jy, jt]
+            result[partial_miss] = np.where(nearest >= sentinel, np.inf, nearest)
+
+        return result
@@ -0,0 +1,27 @@
+import numpy as np
+
+
+def intersect_rays_segments(ox, oy, dx, dy, x3, y3, x4, y4):
+    """
+    Distances along each ray to each segment
+
+    Ray/segment arrays broadcast against each other, e.g. rays as (R, 1) and
+    segments as (M,) or (R, K).
+
+    Returns:
+        Array of ray parameters t (distance for unit directions), np.inf where
+        the ray is parallel to or misses the segment
+    """
+    ex = x4 - x3
+    ey = y4 - y3
+    wx = ox - x3
+    wy = oy - y3
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # One shared determinant per ray/segment pair
+        denom = dx * ey - dy * ex
+        t = (wy * ex - wx * ey) / denom
+        u = (dx * wy - dy * wx) / denom
+
+    hit = (denom != 0) & (t >= 0) & (u >= 0) & (u <= 1)
+    return np.where(hit, t, np.inf)
@@ -0,0 +1,228 @@
+import argparse
+import json
+import mmap
+import struct
+import time
+import numpy as np
+
+MAGIC = b"MCLLOG\x00\x00"
+VERSION = 2
+FILE_HEADER = struct.Struct("<8sHH")    # magic, version, number of sensors
+RECORD_HEADER = struct.Struct("<BI")    # record type, payload length
+TICK_PREFIX = struct.Struct("<q")       # tick index
+SNAPSHOT_PREFIX = struct.Struct("<qII")  # ticks applied so far, particle count, state JSON length
+
+TICK = 1
+SNAPSHOT = 2
+
+
+class LogRecorder:
+    def __init__(self, path, num_sensors, snapshot_interval=0):
+        """
+        Append-only binary log of filter inputs (and optional particle snapshots)
+
+        Each tick stores the odometry delta, the robot location and the
+        measurements as float64. Snapshots store the full particle buffer, the
+        filter's RNG state and its settings, so a replay can start from them;
+        they are also written whenever the filter is changed between ticks
+        (noise, particle count, ...) so replays pick those changes up.
+
+        Args:
+            path: Log file to create
+            num_sensors: Number of measurements per tick
+            snapshot_interval: Take a particle snapshot every this many ticks (0 for none)
+        """
+        self.num_sensors = num_sensors
+        self.snapshot_interval = snapshot_interval
+        self.ticks = 0
+        self._file = open(path, "wb")
+        self._file.write(FILE_HEADER.pack(MAGIC, VERSION, num_sensors))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self, record_type, *parts):
+        length = sum(len(part) for part in parts)
+        self._file.write(RECORD_HEADER.pack(record_type, length))
+        for part in parts:
+            self._file.write(part)
+
+    def record_tick(self, delta_state, robot_location, measurements):
+        """Append one tick of inputs"""
+        values = np.empty(6 + self.num_sensors)
+        values[0:3] = delta_state
+        values[3:6] = robot_location
+        values[6:] = measurements
+        self._write(TICK, TICK_PREFIX.pack(self.ticks), values.tobytes())
+        self.ticks += 1
+
+    def record_snapshot(self, particle_filter):
+        """Append the filter's particles, RNG state and settings as of the ticks recorded so far"""
+        particles = particle_filter.particles
+        buffer = np.ascontiguousarray(particles.buffer[:, :len(particles)])
+        state = json.dumps({
+            "rng": particle_filter.rng.bit_generator.state,
+            "settings": particle_filter.get_settings(),
+        }).encode()
+        self._write(
+            SNAPSHOT,
+            SNAPSHOT_PREFIX.pack(self.ticks, len(particles), len(state)),
+            state,
+            buffer.tobytes(),
+        )
+
+    def maybe_snapshot(self, particle_filter):
+        """Snapshot if the interval says one is due before the next tick"""
+        if self.snapshot_interval and self.ticks % self.snapshot_interval == 0:
+            self.record_snapshot(particle_filter)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class LogReplayer:
+    def __init__(self, path):
+        """
+        Memory-mapped reader for a LogRecorder file
+
+        Opening only walks the record headers to build an index; tick data is
+        read as zero-copy views into the mapping.
+        """
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.num_sensors = FILE_HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an MCL log (version {VERSION})")
+
+        self.tick_offsets = []
+        self.snapshots = []  # (ticks applied, offset)
+        # Last snapshot taken before each tick, applied when a replay reaches that tick
+        self.snapshot_before = {}
+        offset = FILE_HEADER.size
+        size = len(self._map)
+        while offset + RECORD_HEADER.size <= size:
+            record_type, length = RECORD_HEADER.unpack_from(self._map, offset)
+            offset += RECORD_HEADER.size
+            if offset + length > size:
+                break  # Truncated final record (recorder was killed mid-write)
+            if record_type == TICK:
+                self.tick_offsets.append(offset + TICK_PREFIX.size)
+            elif record_type == SNAPSHOT:
+                ticks, _, _ = SNAPSHOT_PREFIX.unpack_from(self._map, offset)
+                self.snapshots.append((ticks, offset))
+                self.snapshot_before[ticks] = offset
+            offset += length
+
+    def __len__(self):
+        return len(self.tick_offsets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def tick(self, index):
+        """(delta_state, robot_location, measurements) of one tick as read-only views"""
+        offset = self.tick_offsets[index]
+        values = np.frombuffer(self._map, dtype=np.float64, count=6 + self.num_sensors, offset=offset)
+        return values[0:3], values[3:6], values[6:]
+
+    def restore_snapshot(self, particle_filter, offset):
+        """Load a snapshot's particles, RNG state and settings into the filter"""
+        ticks, count, state_length = SNAPSHOT_PREFIX.unpack_from(self._map, offset)
+        offset += SNAPSHOT_PREFIX.size
+        state = json.loads(bytes(self._map[offset:offset + state_length]))
+        particle_filter.apply_settings(state["settings"])
+        particle_filter.rng.bit_generator.state = state["rng"]
+        offset += state_length
+        buffer = np.frombuffer(self._map, dtype=np.float64, count=4 * count, offset=offset).reshape(4, count)
+        particle_filter.load_particles(*buffer)
+        return ticks
+
+    def seek(self, particle_filter, tick):
+        """
+        Bring the filter to the state after `tick` ticks, starting from the
+        latest snapshot at or before it
+
+        Returns:
+            The tick reached (ticks before the first snapshot can't be seeked to)
+        """
+        candidates = [(ticks, offset) for ticks, offset in self.snapshots if ticks <= tick]
+        if not candidates:
+            raise ValueError(f"No snapshot at or before tick {tick}")
+        ticks, offset = candidates[-1]
+        start = self.restore_snapshot(particle_filter, offset)
+        self.replay(particle_filter, start, tick)
+        return tick
+
+    def apply(self, particle_filter, index):
+        """Run one logged tick through the filter, restoring any snapshot taken just before it"""
+        if index in self.snapshot_before:
+            self.restore_snapshot(particle_filter, self.snapshot_before[index])
+        delta_state, robot_location, measurements = self.tick(index)
+        particle_filter.set_robot_location(list(robot_location))
+        particle_filter.update(delta_state)
+        particle_filter.reweight(measurements)
+        particle_filter.resample()
+
+    def replay(self, particle_filter, start=0, stop=None, callback=None):
+        """
+        Feed logged ticks [start, stop) through the filter as fast as possible
+
+        Args:
+            callback: Optional callable(index, particle_filter) after each tick
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        for index in range(start, stop):
+            self.apply(particle_filter, index)
+            if callback is not None:
+                callback(index, particle_filter)
+
+    def close(self):
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # Tick views are still alive, the mapping goes away with them
+        self._file.close()
+
+
+def main():
+    from particle_filter import ParticleFilter
+
+    parser = argparse.ArgumentParser(description="Replay an MCL log headless at maximum speed")
+    parser.add_argument("log")
+    parser.add_argument("--seek", type=int, default=None, help="Start from the snapshot at or before this tick")
+    parser.add_argument("--particles", type=int, default=500, help="Particle count if the log has no snapshot at tick 0")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with LogReplayer(args.log) as replayer:
+        _, robot_location, _ = replayer.tick(0)
+        particle_filter = ParticleFilter(args.particles, (144, 144), list(robot_location), seed=args.seed)
+
+        # Snapshots taken before a tick are restored as the replay reaches it, so
+        # starting at 0 picks up the recorder's initial snapshot by itself
+        start = 0
+        if args.seek is not None:
+            start = replayer.seek(particle_filter, args.seek)
+
+        began = time.perf_counter()
+        replayer.replay(particle_filter, start)
+        elapsed = time.perf_counter() - began
+
+        ticks = len(replayer) - start
+        print(f"Replayed {ticks} ticks in {elapsed:.3f} s ({ticks / elapsed if elapsed else float('inf'):.1f} ticks/s)")
+        print(f"Final estimate: {particle_filter.get_estimated_state()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import numpy as np
+
+
+def _cdf(weights):
+    c = np.cumsum(weights)
+    return c / c[-1]
+
+
+def _lookup(c, u):
+    """Index of the particle whose CDF interval contains each u"""
+    return np.minimum(np.searchsorted(c, u, side="right"), len(c) - 1)
+
+
+def systematic(weights, n, rng):
+    """Low variance resampler: one random offset, n evenly spaced pointers"""
+    u = (rng.random() + np.arange(n)) / n
+    return _lookup(_cdf(weights), u)
+
+
+def stratified(weights, n, rng):
+    """One independent uniform draw inside each of n equal strata"""
+    u = (rng.random(n) + np.arange(n)) / n
+    return _lookup(_cdf(weights), u)
+
+
+def multinomial(weights, n, rng):
+    """n independent draws (in random order)"""
+    return _lookup(_cdf(weights), rng.random(n))
+
+
+def residual(weights, n, rng):
+    """Keep floor(n * w) copies of each particle, draw the remainder multinomially"""
+    weights = np.asarray(weights, dtype=float)
+    scaled = n * weights / weights.sum()
+    counts = np.floor(scaled).astype(np.intp)
+    indices = np.repeat(np.arange(len(weights)), counts)
+
+    remaining = n - len(indices)
+    if remaining > 0:
+        indices = np.concatenate((indices, multinomial(scaled - counts, remaining, rng)))
+    return indices
+
+
+RESAMPLERS = {
+    "systematic": systematic,
+    "stratified": stratified,
+    "residual": residual,
+    "multinomial": multinomial,
+}
@@ -0,0 +1,147 @@
+import math
+import time
+import tracemalloc
+import numpy as np
+from particle_filter import ParticleFilter
+
+STAGES = ("update", "reweight", "resample")
+
+
+class Trajectory:
+    def __init__(self, name, poses, deltas):
+        """
+        Scripted robot motion
+
+        Args:
+            name: Trajectory name
+            poses: (T + 1, 3) ground-truth poses, starting pose first
+            deltas: (T, 3) odometry reported to the filter at each tick
+        """
+        self.name = name
+        self.poses = np.asarray(poses, dtype=float)
+        self.deltas = np.asarray(deltas, dtype=float)
+
+    def __len__(self):
+        return len(self.deltas)
+
+
+def _from_poses(name, poses):
+    poses = np.asarray(poses, dtype=float)
+    deltas = np.diff(poses, axis=0)
+    deltas[:, 2] = (deltas[:, 2] + math.pi) % (2 * math.pi) - math.pi
+    return Trajectory(name, poses, deltas)
+
+
+def straight_line(num_ticks=100, box_size=(144, 144), margin=20.0):
+    """Drive left to right across the middle of the field"""
+    xs = np.linspace(margin, box_size[0] - margin, num_ticks + 1)
+    ys = np.full(num_ticks + 1, box_size[1] / 2)
+    return _from_poses("straight", np.column_stack((xs, ys, np.zeros(num_ticks + 1))))
+
+
+def loop(num_ticks=100, box_size=(144, 144), radius=40.0):
+    """Drive one circle around the field center (heading held at 0 like the visualizer robot)"""
+    angles = np.linspace(0, 2 * math.pi, num_ticks + 1)
+    xs = box_size[0] / 2 + radius * np.cos(angles)
+    ys = box_size[1] / 2 + radius * np.sin(angles)
+    return _from_poses("loop", np.column_stack((xs, ys, np.zeros(num_ticks + 1))))
+
+
+def kidnap(num_ticks=100, box_size=(144, 144), margin=20.0):
+    """Straight line, but the robot is teleported halfway without any odometry"""
+    trajectory = straight_line(num_ticks, box_size, margin)
+    half = num_ticks // 2
+    poses = trajectory.poses.copy()
+    poses[half + 1:, 1] -= box_size[1] / 4
+    trajectory.poses = poses
+    trajectory.name = "kidnap"
+    return trajectory
+
+
+TRAJECTORIES = {
+    "straight": straight_line,
+    "loop": loop,
+    "kidnap": kidnap,
+}
+
+
+def _summary(samples):
+    samples = np.asarray(samples, dtype=float)
+    return {
+        "mean": float(samples.mean()),
+        "p50": float(np.percentile(samples, 50)),
+        "p95": float(np.percentile(samples, 95)),
+        "max": float(samples.max()),
+    }
+
+
+def run_simulation(trajectory, num_particles, box_size=(144, 144), seed=0, trace_memory=True, configure=None,
+                   field_model=None):
+    """
+    Run a ParticleFilter along a scripted trajectory without any GUI
+
+    Args:
+        trajectory: Trajectory to follow
+        num_particles: Number of particles
+        box_size: Field size in inches
+        seed: Seed for the filter's random generator
+        trace_memory: Track peak Python/NumPy memory with tracemalloc
+        configure: Optional callable(ParticleFilter) applied before the run
+        field_model: Field geometry (FieldModel or GridMap), defaults to the empty box
+
+    Returns:
+        Dict of timings, throughput, peak memory and pose error
+    """
+    particle_filter = ParticleFilter(num_particles, box_size, list(trajectory.poses[0]), seed=seed,
+                                     field_model=field_model)
+    if configure is not None:
+        configure(particle_filter)
+
+    stage_times = {stage: [] for stage in STAGES}
+    position_errors = []
+    heading_errors = []
+
+    if trace_memory:
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+
+    start = time.perf_counter()
+    for tick in range(len(trajectory)):
+        pose = trajectory.poses[tick + 1]
+        particle_filter.set_robot_location(list(pose))
+
+        t0 = time.perf_counter()
+        particle_filter.update(trajectory.deltas[tick])
+        t1 = time.perf_counter()
+        particle_filter.reweight(particle_filter.measure(pose))
+        t2 = time.perf_counter()
+        particle_filter.resample()
+        t3 = time.perf_counter()
+
+        stage_times["update"].append(t1 - t0)
+        stage_times["reweight"].append(t2 - t1)
+        stage_times["resample"].append(t3 - t2)
+
+        x, y, theta = particle_filter.get_estimated_state()
+        position_errors.append(math.hypot(x - pose[0], y - pose[1]))
+        heading_errors.append(abs((theta - pose[2] + math.pi) % (2 * math.pi) - math.pi))
+    elapsed = time.perf_counter() - start
+
+    peak_memory = None
+    if trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "trajectory": trajectory.name,
+        "num_particles": num_particles,
+        "final_num_particles": particle_filter.num_particles,
+        "seed": seed,
+        "ticks": len(trajectory),
+        "ticks_per_second": len(trajectory) / elapsed if elapsed > 0 else float("inf"),
+        "stage_seconds": {stage: _summary(times) for stage, times in stage_times.items()},
+        "peak_memory_bytes": peak_memory,
+        "position_error": _summary(position_errors),
+        "final_position_error": position_errors[-1],
+        "heading_error": _summary(heading_errors),
+    }
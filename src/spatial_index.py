@@ -0,0 +1,151 @@
+import math
+import numpy as np
+from ray_geometry import intersect_rays_segments
+
+
+class SegmentGrid:
+    def __init__(self, segments, cell_size=None):
+        """
+        Uniform grid over packed segments for ray queries with DDA traversal
+
+        Args:
+            segments: (M, 4) array of x1, y1, x2, y2
+            cell_size: Cell edge length, defaults to roughly sqrt(M) cells per axis
+        """
+        self.segments = np.asarray(segments, dtype=float)
+        xs = self.segments[:, [0, 2]]
+        ys = self.segments[:, [1, 3]]
+        min_x, min_y = xs.min(), ys.min()
+        max_x, max_y = xs.max(), ys.max()
+        extent = max(max_x - min_x, max_y - min_y, 1e-9)
+
+        if cell_size is None:
+            cell_size = extent / max(1, math.ceil(math.sqrt(len(self.segments))))
+        self.cell_size = float(cell_size)
+
+        # Pad by half a cell so geometry on the max edge still falls inside the grid
+        self.origin_x = min_x - 0.5 * self.cell_size
+        self.origin_y = min_y - 0.5 * self.cell_size
+        self.nx = int(math.ceil((max_x - self.origin_x) / self.cell_size)) + 1
+        self.ny = int(math.ceil((max_y - self.origin_y) / self.cell_size)) + 1
+
+        self.cell_segments = self._bin_segments()
+
+    def _bin_segments(self):
+        """Pack the segments overlapping each cell into a (cells, K) table padded with -1"""
+        cs = self.cell_size
+        half_diag = cs * math.sqrt(0.5)
+        buckets = [[] for _ in range(self.nx * self.ny)]
+
+        for index, (x1, y1, x2, y2) in enumerate(self.segments):
+            ix0, ix1 = sorted(int((v - self.origin_x) // cs) for v in (x1, x2))
+            iy0, iy1 = sorted(int((v - self.origin_y) // cs) for v in (y1, y2))
+            cx, cy = np.meshgrid(np.arange(ix0, ix1 + 1), np.arange(iy0, iy1 + 1), indexing="ij")
+            cx = cx.ravel()
+            cy = cy.ravel()
+
+            # Keep cells of the bounding box that the segment's line actually passes near
+            length = math.hypot(x2 - x1, y2 - y1)
+            if length > 0:
+                centers_x = self.origin_x + (cx + 0.5) * cs
+                centers_y = self.origin_y + (cy + 0.5) * cs
+                dist = np.abs((x2 - x1) * (y1 - centers_y) - (x1 - centers_x) * (y2 - y1)) / length
+                keep = dist <= half_diag
+                cx = cx[keep]
+                cy = cy[keep]
+
+            for i, j in zip(cx.tolist(), cy.tolist()):
+                buckets[i * self.ny + j].append(index)
+
+        width = max(1, max(len(b) for b in buckets))
+        table = np.full((len(buckets), width), -1, dtype=np.intp)
+        for cell, bucket in enumerate(buckets):
+            table[cell, :len(bucket)] = bucket
+        return table
+
+    def cast(self, ox, oy, dx, dy):
+        """
+        Nearest hit distance for each ray, walking grid cells front to back
+
+        Args:
+            ox, oy: Ray origins, shape (R,)
+            dx, dy: Unit ray directions, shape (R,)
+
+        Returns:
+            (R,) array of distances, np.inf where a ray hits nothing
+        """
+        cs = self.cell_size
+        distances = np.full(len(ox), np.inf)
+
+        # Clip each ray against the grid bounds (slab test)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv_dx = 1.0 / dx
+            inv_dy = 1.0 / dy
+            tx0 = (self.origin_x - ox) * inv_dx
+            tx1 = (self.origin_x + self.nx * cs - ox) * inv_dx
+            ty0 = (self.origin_y - oy) * inv_dy
+            ty1 = (self.origin_y + self.ny * cs - oy) * inv_dy
+        inside_x = (ox >= self.origin_x) & (ox <= self.origin_x + self.nx * cs)
+        inside_y = (oy >= self.origin_y) & (oy <= self.origin_y + self.ny * cs)
+        tx_near = np.where(dx == 0, np.where(inside_x, -np.inf, np.inf), np.minimum(tx0, tx1))
+        tx_far = np.where(dx == 0, np.where(inside_x, np.inf, -np.inf), np.maximum(tx0, tx1))
+        ty_near = np.where(dy == 0, np.where(inside_y, -np.inf, np.inf), np.minimum(ty0, ty1))
+        ty_far = np.where(dy == 0, np.where(inside_y, np.inf, -np.inf), np.maximum(ty0, ty1))
+        t_enter = np.maximum(np.maximum(tx_near, ty_near), 0.0)
+        t_exit = np.minimum(tx_far, ty_far)
+
+        active = np.flatnonzero(t_enter <= t_exit)
+        if len(active) == 0:
+            return distances
+
+        ox, oy, dx, dy = ox[active], oy[active], dx[active], dy[active]
+        inv_dx, inv_dy, t_enter = inv_dx[active], inv_dy[active], t_enter[active]
+
+        # Starting cell and DDA state
+        px = ox + dx * t_enter
+        py = oy + dy * t_enter
+        ix = np.clip(((px - self.origin_x) // cs).astype(np.intp), 0, self.nx - 1)
+        iy = np.clip(((py - self.origin_y) // cs).astype(np.intp), 0, self.ny - 1)
+        step_x = np.where(dx > 0, 1, -1)
+        step_y = np.where(dy > 0, 1, -1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            next_x = self.origin_x + (ix + (step_x > 0)) * cs
+            next_y = self.origin_y + (iy + (step_y > 0)) * cs
+            t_max_x = np.where(dx == 0, np.inf, (next_x - ox) * inv_dx)
+            t_max_y = np.where(dy == 0, np.inf, (next_y - oy) * inv_dy)
+            t_delta_x = np.where(dx == 0, np.inf, cs * np.abs(inv_dx))
+            t_delta_y = np.where(dy == 0, np.inf, cs * np.abs(inv_dy))
+
+        best = np.full(len(active), np.inf)
+        live = np.arange(len(active))
+        seg = self.segments
+
+        while len(live):
+            candidates = self.cell_segments[ix[live] * self.ny + iy[live]]
+            valid = candidates >= 0
+            s = seg[np.where(valid, candidates, 0)]
+            t = intersect_rays_segments(
+                ox[live, None], oy[live, None], dx[live, None], dy[live, None],
+                s[..., 0], s[..., 1], s[..., 2], s[..., 3]
+            )
+            t = np.where(valid, t, np.inf).min(axis=1)
+            best[live] = np.minimum(best[live], t)
+
+            # Early exit once the nearest hit lies inside the current cell
+            cell_exit = np.minimum(t_max_x[live], t_max_y[live])
+            done = best[live] <= cell_exit
+
+            # Step to the next cell along whichever boundary is crossed first
+            go_x = t_max_x[live] < t_max_y[live]
+            lx = live[go_x]
+            ly = live[~go_x]
+            ix[lx] += step_x[lx]
+            t_max_x[lx] += t_delta_x[lx]
+            iy[ly] += step_y[ly]
+            t_max_y[ly] += t_delta_y[ly]
+
+            left = (ix[live] < 0) | (ix[live] >= self.nx) | (iy[live] < 0) | (iy[live] >= self.ny)
+            live = live[~(done | left)]
+
+        distances[active] = best
+        return distances
@@ -0,0 +1,64 @@
+import math
+import numpy as np
+import pytest
+from batch_filter import BatchParticleFilter
+from particle_filter import ParticleFilter
+
+LOCATIONS = [[30.0, 40.0, 0.0], [100.0, 110.0, 0.0], [72.0, 20.0, 0.0]]
+
+
+def test_reweight_matches_independent_filters():
+    batch = BatchParticleFilter(3, 500, (144, 144), LOCATIONS, seed=0)
+    batch.reweight()
+
+    for k, location in enumerate(LOCATIONS):
+        single = ParticleFilter(500, (144, 144), location)
+        single.particles.x[:], single.particles.y[:], single.particles.theta[:] = batch.x[k], batch.y[k], batch.theta[k]
+        single.reweight()
+        np.testing.assert_allclose(batch.weight[k], single.particles.weight, rtol=1e-9, atol=1e-300)
+
+
+def test_each_filter_tracks_its_own_robot():
+    batch = BatchParticleFilter(3, 1000, (144, 144), LOCATIONS, seed=1)
+    locations = np.array(LOCATIONS)
+    for _ in range(15):
+        locations[:, 0] += 1.0
+        batch.set_robot_locations(locations)
+        batch.update((1.0, 0.0, 0.0))
+        batch.reweight()
+        batch.resample()
+
+    estimates = batch.get_estimated_states()
+    errors = np.hypot(estimates[:, 0] - locations[:, 0], estimates[:, 1] - locations[:, 1])
+    assert np.all(errors < 5.0)
+    assert batch.get_estimated_state(1) == tuple(estimates[1])
+
+
+def test_pose_estimate_matches_the_batch_means():
+    batch = BatchParticleFilter(2, 300, (144, 144), LOCATIONS[:2], seed=4)
+    batch.theta[:] = batch.rng.uniform(-math.pi, math.pi, (2, 300))
+    batch.reweight()
+    estimate = batch.get_pose_estimate(1)
+    assert estimate.mean == pytest.approx(tuple(batch.get_estimated_states()[1]))
+    assert estimate.covariance.shape == (3, 3)
+
+
+def test_resample_is_per_filter():
+    batch = BatchParticleFilter(2, 100, (144, 144), [0, 0, 0], seed=2)
+    batch.x[0], batch.x[1] = 10.0, 120.0
+    batch.weight[:, :] = 0.0
+    batch.weight[0, 3] = batch.weight[1, 7] = 1.0
+    batch.x[0, 3], batch.x[1, 7] = 11.0, 121.0
+    batch.resample()
+
+    assert np.all(np.abs(batch.x[0] - 11.0) < 1.0)
+    assert np.all(np.abs(batch.x[1] - 121.0) < 1.0)
+    np.testing.assert_allclose(batch.weight, 1 / 100)
+
+
+def test_particle_views_share_the_batch_buffer():
+    batch = BatchParticleFilter(2, 10, (144, 144), [0, 0, 0], seed=3)
+    particles = batch.get_particles(1)
+    particles.x[:] = 5.0
+    assert np.all(batch.x[1] == 5.0)
+    assert abs(particles.theta[0]) <= math.pi
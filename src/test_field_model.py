@@ -0,0 +1,90 @@
+import math
+import os
+import numpy as np
+import pytest
+from field_model import FieldModel
+from particle import Particle
+
+MAP_PATH = os.path.join(os.path.dirname(__file__), "..", "maps", "example_field.json")
+
+
+def random_rays(n, seed=0, size=144):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(1, size - 1, n), rng.uniform(1, size - 1, n), rng.uniform(-math.pi, math.pi, n)
+
+
+def scalar_cast(field_model, x, y, headings):
+    distances = []
+    for xi, yi, hi in zip(x, y, headings):
+        d = field_model.get_distance_to_obstacle(Particle((xi, yi, hi), 1.0))
+        distances.append(np.inf if d is None else d)
+    return np.array(distances)
+
+
+def test_batched_casts_match_scalar():
+    field_model = FieldModel()
+    x, y, headings = random_rays(500)
+    np.testing.assert_allclose(field_model.cast_rays(x, y, headings)[:, 0], scalar_cast(field_model, x, y, headings))
+
+
+def test_cast_rays_broadcasts_sensors():
+    field_model = FieldModel()
+    x, y, theta = random_rays(50, seed=1)
+    offsets = np.array([0.0, math.pi / 2, math.pi, -math.pi / 2])
+    headings = theta[:, None] + offsets
+
+    distances = field_model.cast_rays(x, y, headings)
+    assert distances.shape == (50, 4)
+    for s, offset in enumerate(offsets):
+        np.testing.assert_allclose(distances[:, s], field_model.cast_rays(x, y, theta + offset)[:, 0])
+
+
+def test_small_chunks_give_same_result():
+    field_model = FieldModel()
+    x, y, headings = random_rays(300, seed=2)
+    np.testing.assert_array_equal(field_model.cast_rays(x, y, headings, chunk_size=7),
+                                  field_model.cast_rays(x, y, headings))
+
+
+def test_rays_pointing_away_from_every_wall_miss():
+    field_model = FieldModel()
+    distances = field_model.cast_rays([200.0, 72.0], [72.0, 72.0], [0.0, 0.0])[:, 0]
+    assert distances[0] == np.inf
+    assert distances[1] == pytest.approx(72.0)
+
+
+@pytest.mark.parametrize("path", [None, MAP_PATH])
+def test_grid_index_matches_linear_scan(path):
+    linear = FieldModel(use_index=False) if path is None else FieldModel.from_json(path, use_index=False)
+    grid = FieldModel(linear.line_points, use_index=True)
+    assert linear.index is None and grid.index is not None
+
+    x, y, headings = random_rays(500)
+    expected = scalar_cast(linear, x, y, headings)
+    np.testing.assert_allclose(linear.cast_rays(x, y, headings)[:, 0], expected)
+    np.testing.assert_allclose(grid.cast_rays(x, y, headings)[:, 0], expected)
+
+
+def test_large_maps_get_the_index_automatically():
+    rng = np.random.default_rng(3)
+    starts = rng.uniform(0, 144, (200, 2))
+    ends = starts + rng.uniform(-10, 10, (200, 2))
+    field_model = FieldModel([(tuple(a), tuple(b)) for a, b in zip(starts, ends)])
+    assert field_model.index is not None
+
+    linear = FieldModel(field_model.line_points, use_index=False)
+    x, y, headings = random_rays(500, seed=4)
+    np.testing.assert_allclose(field_model.cast_rays(x, y, headings), linear.cast_rays(x, y, headings))
+
+
+def test_from_json_closes_polygons():
+    field_model = FieldModel.from_json(MAP_PATH)
+    assert len(field_model.segments) == 4 + 6 * 4
+    assert field_model.line_points[4][0] == field_model.line_points[7][1]
+
+
+def test_rays_leaving_open_geometry_miss():
+    field_model = FieldModel([((0, 0), (10, 0))])
+    distances = field_model.cast_rays([5, 5], [5, 5], [-math.pi / 2, math.pi / 2])[:, 0]
+    assert distances[0] == pytest.approx(5.0)
+    assert distances[1] == np.inf
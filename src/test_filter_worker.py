@@ -0,0 +1,87 @@
+import time
+import numpy as np
+from filter_worker import DoubleBuffer, FilterWorker
+from particle_filter import ParticleFilter
+from update_scheduler import UpdateScheduler
+
+START = [72.0, 72.0, 0.0]
+
+
+def make_worker(**kwargs):
+    particle_filter = ParticleFilter(200, (144, 144), list(START), seed=0)
+    return FilterWorker(particle_filter, **kwargs)
+
+
+def gated_worker():
+    return make_worker(scheduler=UpdateScheduler(min_translation=1.0))
+
+
+def test_double_buffer_swaps_in_the_newest_item():
+    buffer = DoubleBuffer()
+    assert buffer.latest() is None
+    buffer.publish("a")
+    buffer.publish("b")
+    assert buffer.latest() == "b"
+
+
+def test_small_motions_are_coalesced_into_one_update():
+    worker = gated_worker()
+    for _ in range(3):
+        worker.submit_odometry((0.4, 0.0, 0.0), START)
+        worker.step()
+    stats = worker.scheduler.stats()
+    assert stats["executed"] == 1 and stats["skipped"] == 2 and stats["coalesced"] == 2
+    assert worker.latest().tick == 1
+
+
+def test_commands_publish_without_a_measurement_update():
+    worker = gated_worker()
+    worker.submit(lambda pf: pf.resize(500))
+    worker.step()
+
+    assert worker.scheduler.executed == 0
+    snapshot = worker.latest()
+    assert snapshot.tick == 0
+    assert len(snapshot.particles) == 500
+    assert not snapshot.particles.buffer.flags.writeable
+
+
+def test_replacement_filter_forces_an_update():
+    worker = gated_worker()
+    replacement = ParticleFilter(300, (144, 144), list(START), seed=1)
+    worker.submit(lambda pf: replacement)
+    worker.step()
+
+    assert worker.particle_filter is replacement
+    assert worker.scheduler.executed == 1
+    assert len(worker.latest().particles) == 300
+
+
+def test_filter_rate_reaches_a_supplied_scheduler():
+    scheduler = UpdateScheduler(base_rate=10.0)
+    worker = make_worker(filter_rate=50.0, scheduler=scheduler)
+    assert worker.scheduler is scheduler
+    assert scheduler.interval == 0.02
+
+
+def test_snapshots_are_copies():
+    worker = make_worker()
+    worker.submit_odometry((2.0, 0.0, 0.0), START)
+    worker.step()
+    snapshot = worker.latest()
+    before = snapshot.particles.states().copy()
+    worker.submit_odometry((2.0, 0.0, 0.0), START)
+    worker.step()
+    np.testing.assert_array_equal(snapshot.particles.states(), before)
+
+
+def test_thread_runs_and_stops():
+    worker = make_worker(filter_rate=200.0)
+    worker.start()
+    worker.submit_odometry((2.0, 0.0, 0.0), START)
+    deadline = time.monotonic() + 5.0
+    while (worker.latest() is None or worker.latest().tick == 0) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    worker.stop(timeout=5.0)
+    assert not worker.is_alive()
+    assert worker.latest().tick >= 1
@@ -0,0 +1,80 @@
+import math
+import numpy as np
+import pytest
+from field_model import FieldModel
+from grid_map import GridMap
+
+
+def box_grid(size=20, resolution=1.0):
+    occupied = np.zeros((size, size), dtype=bool)
+    occupied[0, :] = occupied[-1, :] = occupied[:, 0] = occupied[:, -1] = True
+    return GridMap(occupied, resolution)
+
+
+def test_axis_aligned_rays_stop_at_cell_walls():
+    grid = box_grid()
+    # Walls are cells 0 and 19, so their inner faces are at 1 and 19
+    x = [5.5, 5.5, 5.5, 5.5]
+    y = [7.5, 7.5, 7.5, 7.5]
+    headings = [0.0, math.pi / 2, math.pi, -math.pi / 2]
+    np.testing.assert_allclose(grid.cast_rays(x, y, headings)[:, 0], [13.5, 11.5, 4.5, 6.5])
+
+
+def test_diagonal_ray():
+    grid = box_grid()
+    distance = grid.cast_rays([5.5], [5.5], [math.pi / 4])[0, 0]
+    assert distance == pytest.approx(13.5 * math.sqrt(2))
+
+
+def test_origin_inside_obstacle_is_zero():
+    grid = box_grid()
+    assert grid.cast_rays([0.5], [10.0], [0.0])[0, 0] == 0.0
+
+
+def test_misses_past_max_range_and_off_the_grid():
+    occupied = np.zeros((20, 20), dtype=bool)
+    occupied[15, :] = True
+    grid = GridMap(occupied, max_range=5.0)
+    distances = grid.cast_rays([5.5, 5.5, 12.5], [5.5, 5.5, 5.5], [math.pi, 0.0, 0.0])[:, 0]
+    assert distances[0] == np.inf   # Leaves the grid
+    assert distances[1] == np.inf   # Wall at 9.5 is past max_range
+    assert distances[2] == pytest.approx(2.5)
+
+
+def test_from_array_uses_image_layout():
+    image = np.zeros((10, 30))
+    image[:, 25] = 1.0
+    grid = GridMap.from_array(image)
+    assert (grid.nx, grid.ny) == (30, 10)
+    assert grid.cast_rays([20.5], [5.0], [0.0])[0, 0] == pytest.approx(4.5)
+
+
+def test_from_image_marks_dark_pixels(tmp_path):
+    QtGui = pytest.importorskip("PyQt6.QtGui")
+    image = QtGui.QImage(7, 5, QtGui.QImage.Format.Format_Grayscale8)
+    image.fill(255)
+    image.setPixel(2, 1, 0)
+    path = str(tmp_path / "map.png")
+    assert image.save(path)
+
+    expected = np.zeros((7, 5), dtype=bool)
+    expected[2, 1] = True
+    np.testing.assert_array_equal(GridMap.from_image(path).occupied, expected)
+
+
+def test_matches_segment_field_within_a_cell():
+    field_model = FieldModel()
+    grid = GridMap.from_field_model(field_model, resolution=0.5)
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(5, 139, 500), rng.uniform(5, 139, 500)
+    headings = rng.uniform(-math.pi, math.pi, 500)
+
+    expected = field_model.cast_rays(x, y, headings)[:, 0]
+    distances = grid.cast_rays(x, y, headings)[:, 0]
+    # Wall cells straddle the segments, so beams stop early (by a lot at grazing
+    # angles) but always on a cell that covers a wall
+    assert np.all(distances <= expected + 1e-9)
+    end_x = x + distances * np.cos(headings)
+    end_y = y + distances * np.sin(headings)
+    to_wall = np.minimum.reduce([end_x, end_y, 144 - end_x, 144 - end_y])
+    assert np.all(np.abs(to_wall) <= 0.5 + 1e-9)
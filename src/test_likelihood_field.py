@@ -0,0 +1,47 @@
+import math
+import numpy as np
+import pytest
+from field_model import FieldModel
+from likelihood_field import LikelihoodField, distance_transform
+
+
+def brute_force_distances(occupied):
+    cells = np.argwhere(occupied)
+    i, j = np.indices(occupied.shape)
+    d2 = (i[..., None] - cells[:, 0]) ** 2 + (j[..., None] - cells[:, 1]) ** 2
+    return np.sqrt(d2.min(axis=-1))
+
+
+@pytest.mark.parametrize("seed, shape, density", [(0, (40, 30), 0.02), (1, (25, 60), 0.1), (2, (50, 50), 0.002)])
+def test_distance_transform_is_exact(seed, shape, density):
+    occupied = np.random.default_rng(seed).random(shape) < density
+    occupied[0, 0] = True
+    np.testing.assert_allclose(distance_transform(occupied), brute_force_distances(occupied))
+
+
+def test_distance_transform_of_a_single_cell():
+    occupied = np.zeros((9, 7), dtype=bool)
+    occupied[8, 6] = True
+    np.testing.assert_allclose(distance_transform(occupied), brute_force_distances(occupied))
+
+
+def test_empty_grid_is_far_everywhere():
+    distances = distance_transform(np.zeros((5, 6), dtype=bool))
+    assert np.all(distances >= 11)
+
+
+def test_lookup_peaks_on_walls_and_is_random_off_the_map():
+    field = LikelihoodField(FieldModel(), resolution=1.0, sigma=2.0)
+    on_wall, mid_field, off_map = field.lookup(np.array([0.0, 72.0, 500.0]), np.array([50.0, 72.0, 50.0]))
+    assert on_wall == pytest.approx(math.log(field.z_hit + field.z_rand))
+    assert mid_field == pytest.approx(field.log_miss)
+    assert off_map == field.log_miss
+
+
+def test_with_sigma_matches_a_fresh_build():
+    field_model = FieldModel()
+    field = LikelihoodField(field_model, resolution=1.0, sigma=7.0)
+    changed = field.with_sigma(2.5)
+    np.testing.assert_allclose(changed.log_likelihood, LikelihoodField(field_model, 1.0, sigma=2.5).log_likelihood)
+    assert field.sigma == 7.0
+    assert changed.distances is field.distances
@@ -0,0 +1,96 @@
+import asyncio
+import struct
+import pytest
+import localization_server
+from localization_server import (ERROR, FRAME_HEADER, HELLO, HELLO_MSG, POSE, POSE_MSG, READY, STEP, STEP_PREFIX,
+                                 LocalizationServer, pack_frame, pack_step)
+
+HELLO_PAYLOAD = HELLO_MSG.pack(200, 0, 144, 144, 72, 72, 0, 0)
+MEASUREMENTS = [71.5, 71.5, 71.5, 71.5]
+
+
+async def recv(reader):
+    frame_type, length = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    return frame_type, await reader.readexactly(length)
+
+
+def run_session(exchange):
+    """Start a server on a free port and run exchange(reader, writer) against it"""
+    async def main():
+        server = LocalizationServer(workers=2)
+        tcp = await server.start_tcp("127.0.0.1", 0)
+        port = tcp.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            return await asyncio.wait_for(exchange(reader, writer), 10)
+        finally:
+            writer.close()
+            await server.close()
+
+    return asyncio.run(main())
+
+
+def test_hello_and_step_round_trip():
+    async def exchange(reader, writer):
+        writer.write(pack_frame(HELLO, HELLO_PAYLOAD))
+        assert await recv(reader) == (READY, struct.pack("<I", 200))
+        writer.write(pack_step(1, [(0.5, 0.0, 0.0)], MEASUREMENTS))
+        frame_type, payload = await recv(reader)
+        assert frame_type == POSE
+        seq, dropped, x, y, *_ = POSE_MSG.unpack(payload)
+        assert (seq, dropped) == (1, 0)
+        assert 0 <= x <= 144 and 0 <= y <= 144
+
+    run_session(exchange)
+
+
+@pytest.mark.parametrize("frame", [
+    pack_frame(HELLO, HELLO_PAYLOAD[:-1]),
+    pack_frame(HELLO, HELLO_PAYLOAD + b"\x00"),
+    pack_frame(HELLO, HELLO_MSG.pack(0, 0, 144, 144, 72, 72, 0, 0)),
+    pack_frame(STEP, STEP_PREFIX.pack(1, 1, 0)),
+    pack_frame(99),
+], ids=["short hello", "long hello", "no particles", "step before hello", "unknown type"])
+def test_bad_frames_get_an_error_and_the_connection_survives(frame):
+    async def exchange(reader, writer):
+        writer.write(frame)
+        assert (await recv(reader))[0] == ERROR
+        writer.write(pack_frame(HELLO, HELLO_PAYLOAD))
+        assert (await recv(reader))[0] == READY
+
+    run_session(exchange)
+
+
+@pytest.mark.parametrize("payload", [
+    STEP_PREFIX.pack(1, 1, 0)[:-1],
+    STEP_PREFIX.pack(1, 1, 0) + b"\x00" * 23,
+    STEP_PREFIX.pack(1, 2, 0) + b"\x00" * 24,
+    STEP_PREFIX.pack(1, 1, 3) + b"\x00" * 48,
+], ids=["short prefix", "partial double", "missing delta", "wrong sensor count"])
+def test_malformed_steps_get_an_error(payload):
+    async def exchange(reader, writer):
+        writer.write(pack_frame(HELLO, HELLO_PAYLOAD))
+        assert (await recv(reader))[0] == READY
+        writer.write(pack_frame(STEP, payload))
+        assert (await recv(reader))[0] == ERROR
+        writer.write(pack_step(2, [(0.5, 0.0, 0.0)]))
+        assert (await recv(reader))[0] == POSE
+
+    run_session(exchange)
+
+
+def test_step_failures_are_reported(monkeypatch):
+    def failing_step(self, delta, measurements):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(localization_server.Session, "step", failing_step)
+
+    async def exchange(reader, writer):
+        writer.write(pack_frame(HELLO, HELLO_PAYLOAD))
+        assert (await recv(reader))[0] == READY
+        writer.write(pack_step(7, [(0.5, 0.0, 0.0)]))
+        frame_type, payload = await recv(reader)
+        assert frame_type == ERROR
+        assert payload == b"step 7 failed: boom"
+
+    run_session(exchange)
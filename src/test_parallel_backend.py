@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from particle_filter import ParticleFilter
+
+ROBOT = [50.0, 90.0, 0.3]
+
+
+@pytest.fixture
+def filters():
+    serial = ParticleFilter(3000, (144, 144), list(ROBOT), seed=0)
+    parallel = ParticleFilter(3000, (144, 144), list(ROBOT), seed=0, backend="parallel", workers=2)
+    serial.particles.theta[:] = serial.rng.uniform(-np.pi, np.pi, 3000)
+    parallel.particles.buffer[:, :3000] = serial.particles.buffer[:, :3000]
+    yield serial, parallel
+    parallel.close()
+
+
+def test_reweight_matches_serial(filters):
+    serial, parallel = filters
+    measurements = serial.measure()
+    serial.reweight(measurements)
+    parallel.reweight(measurements)
+    np.testing.assert_allclose(parallel.particles.weight, serial.particles.weight, rtol=1e-9, atol=1e-300)
+
+
+def test_likelihood_field_reweight_matches_serial(filters):
+    serial, parallel = filters
+    for particle_filter in filters:
+        particle_filter.set_sensor_model("likelihood_field")
+        particle_filter.set_sigma(4.0)
+    measurements = serial.measure()
+    serial.reweight(measurements)
+    parallel.reweight(measurements)
+    np.testing.assert_allclose(parallel.particles.weight, serial.particles.weight, rtol=1e-9, atol=1e-300)
+
+
+def test_update_moves_every_shard(filters):
+    _, parallel = filters
+    before = parallel.particles.states().copy()
+    parallel.update((5.0, 0.0, 0.0))
+    moved = parallel.particles.x - before[:, 0]
+    assert abs(np.median(moved) - 5.0) < 0.5
+    assert np.all((parallel.particles.x >= 0) & (parallel.particles.x <= 144))
+
+
+def test_resize_past_capacity_reallocates_shared_memory(filters):
+    serial, parallel = filters
+    block = parallel.backend.block.name
+    parallel.resize(10000)
+    assert parallel.backend.block.name != block
+    assert len(parallel.particles) == 10000
+
+    parallel.reweight()
+    assert parallel.particles.weight.sum() == pytest.approx(1.0)
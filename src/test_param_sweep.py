@@ -0,0 +1,64 @@
+import json
+from param_sweep import PARAMS, cheapest_meeting, load_results, pareto_frontier, run_key, run_sweep, summarize
+
+CONFIG = {"num_particles": 100, "noise": 0.2, "sigma": 7.0, "jitter": 0.05}
+
+
+def run(trajectory="straight", seed=0, tick_seconds=0.01, error=2.0, **config):
+    return {**CONFIG, **config, "trajectory": trajectory, "seed": seed, "ticks": 50, "tick_seconds": tick_seconds,
+            "position_error": error, "position_error_p95": error * 2, "final_position_error": error}
+
+
+def test_load_results_drops_a_torn_last_line(tmp_path):
+    path = tmp_path / "sweep.jsonl"
+    complete = json.dumps(run()) + "\n" + json.dumps(run(seed=1)) + "\n"
+    path.write_text(complete + json.dumps(run(seed=2))[:-10])
+
+    results, length = load_results(str(path))
+    assert [r["seed"] for r in results] == [0, 1]
+    assert length == len(complete.encode())
+    assert load_results(str(tmp_path / "missing.jsonl")) == ([], 0)
+
+
+def test_load_results_drops_a_complete_but_unterminated_line(tmp_path):
+    path = tmp_path / "sweep.jsonl"
+    path.write_text(json.dumps(run()) + "\n" + json.dumps(run(seed=1)))
+    results, _ = load_results(str(path))
+    assert len(results) == 1
+
+
+def test_run_key_covers_every_param():
+    keys = {run_key({**CONFIG, name: -1}, "straight", 0, 50) for name in PARAMS}
+    assert len(keys) == len(PARAMS)
+
+
+def test_summary_frontier_and_pick():
+    results = [
+        run(num_particles=100, tick_seconds=0.01, error=6.0),
+        run(num_particles=100, tick_seconds=0.01, error=4.0, seed=1),
+        run(num_particles=300, tick_seconds=0.03, error=3.0),
+        run(num_particles=1000, tick_seconds=0.10, error=3.5),
+        run(num_particles=3000, tick_seconds=0.30, error=1.0, trajectory="loop"),
+    ]
+    rows = summarize(results)["all"]
+    assert [row["num_particles"] for row in rows] == [100, 300, 1000, 3000]
+    assert rows[0]["runs"] == 2 and rows[0]["position_error"] == 5.0
+
+    assert [row["num_particles"] for row in pareto_frontier(rows)] == [100, 300, 3000]
+    assert cheapest_meeting(rows, 3.2)["num_particles"] == 300
+    assert cheapest_meeting(rows, 0.5) is None
+
+    by_trajectory = summarize(results, "trajectory")
+    assert set(by_trajectory) == {"straight", "loop"}
+
+
+def test_sweep_resumes_where_it_stopped(tmp_path):
+    output = str(tmp_path / "sweep.jsonl")
+    configs = [CONFIG, {**CONFIG, "noise": 0.4}]
+    first = run_sweep(configs[:1], ["straight"], range(2), 5, output, workers=2)
+    assert len(first) == 2
+
+    second = run_sweep(configs, ["straight"], range(2), 5, output, workers=2)
+    assert len(second) == 4
+    assert second[:2] == first
+    assert len(load_results(output)[0]) == 4
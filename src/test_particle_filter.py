@@ -0,0 +1,151 @@
+import json
+import math
+import numpy as np
+import pytest
+import particle_filter as particle_filter_module
+from likelihood_field import LikelihoodField
+from particle_filter import ParticleFilter
+
+ROBOT = [40.0, 60.0, 0.0]
+
+
+def make_filter(n=1000, seed=0):
+    return ParticleFilter(n, (144, 144), list(ROBOT), seed=seed)
+
+
+def set_weights(particle_filter, weights):
+    weights = np.asarray(weights, dtype=float)
+    particle_filter.particles.weight[:] = weights / weights.sum()
+
+
+def test_reweight_favors_particles_at_the_robot():
+    particle_filter = make_filter(200)
+    particles = particle_filter.particles
+    particles.x[:100], particles.y[:100] = ROBOT[0], ROBOT[1]
+    particle_filter.reweight()
+
+    assert particles.weight.sum() == pytest.approx(1.0)
+    assert particles.weight[:100].min() > particles.weight[100:].max()
+
+
+def test_reweight_does_not_underflow_far_from_the_robot():
+    particle_filter = make_filter(100)
+    particle_filter.set_sigma(0.01)
+    particle_filter.reweight()
+    weights = particle_filter.particles.weight
+    assert np.all(np.isfinite(weights))
+    assert weights.sum() == pytest.approx(1.0)
+
+
+def test_resample_waits_for_the_ess_threshold():
+    particle_filter = make_filter(100)
+    particle_filter.set_resampler("systematic", threshold=0.5)
+    before = particle_filter.particles.states().copy()
+    set_weights(particle_filter, np.r_[np.full(60, 1.0), np.full(40, 0.5)])
+    particle_filter.resample()
+    np.testing.assert_array_equal(particle_filter.particles.states(), before)
+
+    set_weights(particle_filter, np.r_[1.0, np.full(99, 1e-6)])
+    particle_filter.resample()
+    assert len(particle_filter.particles) == 100
+    np.testing.assert_allclose(particle_filter.particles.weight, 0.01)
+    assert np.all(np.abs(particle_filter.particles.x - before[0, 0]) < 1.0)
+
+
+def test_resize_grow_keeps_the_belief():
+    particle_filter = make_filter(500)
+    rng = np.random.default_rng(1)
+    set_weights(particle_filter, rng.random(500) ** 4)
+    weights = particle_filter.particles.weight.copy()
+    states = particle_filter.particles.states().copy()
+    mean = np.array(particle_filter.get_estimated_state())
+
+    particle_filter.resize(5000)
+    particles = particle_filter.particles
+    assert len(particles) == particle_filter.num_particles == 5000
+    assert particles.weight.sum() == pytest.approx(1.0)
+    # The old particles are untouched and keep their share of the weight
+    np.testing.assert_array_equal(particles.states()[:500], states)
+    np.testing.assert_allclose(particles.weight[:500], weights * 500 / 5000)
+    np.testing.assert_allclose(particle_filter.get_estimated_state()[:2], mean[:2], atol=3.0)
+
+
+def test_resize_shrink_keeps_the_belief():
+    particle_filter = make_filter(5000)
+    rng = np.random.default_rng(2)
+    set_weights(particle_filter, np.exp(-((particle_filter.particles.x - 100) / 10) ** 2) + 1e-3 * rng.random(5000))
+    mean = np.array(particle_filter.get_estimated_state())
+
+    particle_filter.resize(500)
+    particles = particle_filter.particles
+    assert len(particles) == particle_filter.num_particles == 500
+    np.testing.assert_allclose(particles.weight, 1 / 500)
+    np.testing.assert_allclose(particle_filter.get_estimated_state()[:2], mean[:2], atol=3.0)
+
+
+def test_kld_count_follows_the_spread():
+    particle_filter = make_filter(2000)
+    particle_filter.set_adaptive(True, min_particles=50, max_particles=4000)
+    particle_filter.resample_threshold = 1.1
+
+    # Spread over the whole field: many bins, many particles (up to the cap)
+    set_weights(particle_filter, particle_filter.rng.uniform(0.5, 1.0, 2000))
+    particle_filter.resample()
+    spread = particle_filter.num_particles
+    assert 50 <= spread <= 4000
+
+    # Everything in one spot: a handful of bins, so close to the minimum
+    particles = particle_filter.particles
+    particles.x[:], particles.y[:], particles.theta[:] = ROBOT
+    set_weights(particle_filter, particle_filter.rng.uniform(0.5, 1.0, len(particles)))
+    particle_filter.resample()
+    concentrated = particle_filter.num_particles
+    assert 50 <= concentrated < spread
+    assert particle_filter.kld_stats["num_particles"] == concentrated
+    assert len(particle_filter.particles) == concentrated
+
+
+def test_kld_draw_cost_tracks_the_chosen_count(monkeypatch):
+    drawn = []
+
+    def counting_multinomial(weights, n, rng):
+        drawn.append(n)
+        return multinomial(weights, n, rng)
+
+    multinomial = particle_filter_module.multinomial
+    monkeypatch.setattr(particle_filter_module, "multinomial", counting_multinomial)
+
+    particle_filter = make_filter(2000)
+    particle_filter.set_adaptive(True, min_particles=50, max_particles=50000)
+    particles = particle_filter.particles
+    particles.x[:] = ROBOT[0] + particle_filter.rng.normal(0, 3, 2000)
+    particles.y[:] = ROBOT[1] + particle_filter.rng.normal(0, 3, 2000)
+    particle_filter.resample_threshold = 1.1
+    particle_filter.resample()
+
+    # Doubling chunks never draw more than twice what was kept
+    assert sum(drawn) <= 2 * particle_filter.num_particles
+    assert particle_filter.num_particles < 50000
+
+
+def test_set_sigma_rebuilds_the_likelihood_field():
+    particle_filter = make_filter(10)
+    particle_filter.set_sensor_model("likelihood_field")
+    particle_filter.set_sigma(3.0)
+
+    expected = LikelihoodField(particle_filter.field_model, sigma=3.0)
+    assert particle_filter.likelihood_field.sigma == 3.0
+    np.testing.assert_allclose(particle_filter.likelihood_field.log_likelihood, expected.log_likelihood)
+
+
+def test_settings_round_trip_through_json():
+    source = make_filter(10)
+    source.set_noise(0.35)
+    source.set_sigma(4.0)
+    source.set_sensor_layout([[1.0, 0.0, 0.0], [0.0, 2.0, math.pi / 2]])
+    source.set_resampler("residual", threshold=0.8, jitter=(0.1, 0.2, 0.03))
+    source.set_adaptive(True, bin_size=(3.0, 3.0, 0.2), min_particles=20, max_particles=900)
+
+    target = make_filter(10)
+    target.apply_settings(json.loads(json.dumps(source.get_settings())))
+    assert target.get_settings() == source.get_settings()
@@ -0,0 +1,50 @@
+import numpy as np
+from particle_set import ParticleSet
+
+
+def filled(n, capacity=None):
+    particles = ParticleSet(n, capacity)
+    particles.x[:] = np.arange(n)
+    particles.y[:] = np.arange(n) * 2
+    particles.theta[:] = np.arange(n) * 0.1
+    return particles
+
+
+def test_new_set_has_uniform_weights():
+    particles = ParticleSet(8)
+    assert len(particles) == 8
+    np.testing.assert_allclose(particles.weight, 1 / 8)
+
+
+def test_resize_keeps_leading_particles_and_reuses_capacity():
+    particles = filled(10, capacity=32)
+    buffer = particles.buffer
+    particles.resize(4)
+    np.testing.assert_array_equal(particles.x, [0, 1, 2, 3])
+    particles.resize(20)
+    assert particles.buffer is buffer
+    np.testing.assert_array_equal(particles.x[:4], [0, 1, 2, 3])
+
+
+def test_resize_past_capacity_copies_the_kept_particles():
+    particles = filled(10)
+    particles.resize(25)
+    assert particles.capacity >= 25
+    np.testing.assert_array_equal(particles.x[:10], np.arange(10))
+    np.testing.assert_array_equal(particles.y[:10], np.arange(10) * 2)
+
+
+def test_take_gathers_and_can_grow():
+    particles = filled(5)
+    particles.take(np.array([4, 4, 0, 2, 1, 3, 3]))
+    np.testing.assert_array_equal(particles.x, [4, 4, 0, 2, 1, 3, 3])
+    np.testing.assert_allclose(particles.theta, np.array([4, 4, 0, 2, 1, 3, 3]) * 0.1)
+
+
+def test_views_write_through():
+    particles = filled(3)
+    view = particles[-1]
+    view.set_state((7.0, 8.0, 0.5))
+    view.set_weight(0.25)
+    assert particles.states()[2].tolist() == [7.0, 8.0, 0.5]
+    assert particles.weight[2] == 0.25
@@ -0,0 +1,65 @@
+import math
+import numpy as np
+import pytest
+from pose_estimator import estimate_pose, extract_clusters
+
+
+def test_heading_mean_wraps_around_pi():
+    theta = np.array([math.pi - 0.1, -math.pi + 0.1, math.pi - 0.05, -math.pi + 0.05])
+    estimate = estimate_pose(np.zeros(4), np.zeros(4), theta)
+    assert abs(abs(estimate.mean[2]) - math.pi) < 1e-9
+
+
+def test_matches_weighted_moments():
+    rng = np.random.default_rng(0)
+    x, y = rng.normal(50, 4, 2000), rng.normal(80, 2, 2000)
+    theta = rng.normal(0.3, 0.1, 2000)
+    weights = rng.random(2000)
+
+    estimate = estimate_pose(x, y, theta, weights)
+    w = weights / weights.sum()
+    assert estimate.mean[0] == pytest.approx(np.dot(w, x))
+    assert estimate.mean[1] == pytest.approx(np.dot(w, y))
+    assert estimate.mean[2] == pytest.approx(math.atan2(np.dot(w, np.sin(theta)), np.dot(w, np.cos(theta))))
+
+    residuals = np.vstack([x - estimate.mean[0], y - estimate.mean[1], np.sin(theta - estimate.mean[2])])
+    np.testing.assert_allclose(estimate.covariance, (residuals * w) @ residuals.T, atol=1e-9)
+
+
+def test_clusters_find_separate_modes():
+    rng = np.random.default_rng(1)
+    x = np.r_[rng.normal(20, 1, 600), rng.normal(120, 1, 300), rng.normal(70, 1, 100)]
+    y = np.r_[rng.normal(20, 1, 600), rng.normal(120, 1, 300), rng.normal(20, 1, 100)]
+    theta = np.r_[np.full(600, 0.5), np.full(300, -2.0), np.full(100, 3.0)]
+
+    clusters = extract_clusters(x, y, theta, k=3)
+    assert [round(c.mass, 2) for c in clusters] == [0.6, 0.3, 0.1]
+    assert clusters[0].mean == pytest.approx((20, 20, 0.5), abs=0.3)
+    assert clusters[1].mean == pytest.approx((120, 120, -2.0), abs=0.3)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_clusters_never_share_weight(seed):
+    rng = np.random.default_rng(seed)
+    # One broad blob: neighbouring cells are all heavy, so naive top-k would repeat it
+    x, y = rng.normal(72, 8, 3000), rng.normal(72, 8, 3000)
+    theta = rng.uniform(-math.pi, math.pi, 3000)
+
+    clusters = extract_clusters(x, y, theta, rng.random(3000), cell_size=6.0, k=5)
+    assert sum(c.mass for c in clusters) <= 1.0 + 1e-9
+    centers = np.array([c.mean[:2] for c in clusters])
+    gaps = np.hypot(*(centers[:, None] - centers[None, :]).transpose(2, 0, 1))
+    assert np.all(gaps[np.triu_indices(len(clusters), 1)] > 6.0)
+
+
+def test_clusters_on_ties_and_single_cell():
+    # Two equal blobs: both come out, once each
+    x = np.r_[np.full(50, 10.0), np.full(50, 100.0)]
+    y = np.full(100, 10.0)
+    clusters = extract_clusters(x, y, np.zeros(100), k=3)
+    assert len(clusters) == 2
+    assert sorted(c.mean[0] for c in clusters) == [10.0, 100.0]
+    assert [c.mass for c in clusters] == [0.5, 0.5]
+
+    assert len(extract_clusters(np.ones(5), np.ones(5), np.zeros(5), k=3)) == 1
+    assert extract_clusters([], [], []) == []
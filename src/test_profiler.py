@@ -0,0 +1,54 @@
+import csv
+import json
+import pytest
+from profiler import NUM_BUCKETS, Profiler
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = Profiler()
+    with profiler.stage("update", 10):
+        pass
+    profiler.count("rays", 5)
+    stats = profiler.stats()
+    assert stats["stages"] == {} and stats["counters"] == {}
+
+
+def test_stage_stats_and_percentiles():
+    profiler = Profiler()
+    profiler.enable()
+    for seconds in [0.001] * 19 + [0.1]:
+        profiler.record("reweight", seconds, items=100)
+    with profiler.stage("reweight", 100):
+        pass
+    profiler.count("ray_casts", 400)
+
+    stage = profiler.stats()["stages"]["reweight"]
+    assert stage["calls"] == 21
+    assert stage["items"] == 2100
+    assert stage["max_seconds"] == 0.1
+    assert sum(stage["histogram"]) == 21 and len(stage["histogram"]) == NUM_BUCKETS
+    # Percentiles are bucket upper edges, within a quarter decade of the samples
+    assert 0.001 <= stage["p50_seconds"] <= 0.001 * 10 ** 0.25
+    assert stage["p95_seconds"] <= 0.1
+    assert profiler.stats()["counters"]["ray_casts"]["total"] == 400
+
+
+def test_exports(tmp_path):
+    profiler = Profiler()
+    profiler.enable()
+    profiler.record("update", 0.002, items=50)
+    profiler.count("ray_casts", 8)
+
+    profiler.dump_json(tmp_path / "stats.json")
+    with open(tmp_path / "stats.json") as f:
+        assert json.load(f)["stages"]["update"]["calls"] == 1
+
+    profiler.dump_csv(tmp_path / "stats.csv")
+    with open(tmp_path / "stats.csv") as f:
+        rows = {row["stage"]: row for row in csv.DictReader(f)}
+    assert float(rows["update"]["mean_seconds"]) == pytest.approx(0.002)
+    assert rows["ray_casts"]["items"] == "8"
+
+    assert [line.split()[0] for line in profiler.summary_lines()] == ["update", "ray_casts"]
+    profiler.reset()
+    assert profiler.stats()["stages"] == {}
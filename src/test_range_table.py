@@ -0,0 +1,53 @@
+import math
+import pickle
+import numpy as np
+from field_model import FieldModel
+from range_table import RangeTable
+
+
+def test_lookup_matches_live_casts(tmp_path):
+    field_model = FieldModel()
+    table = RangeTable(field_model, resolution=1.0, theta_bins=360, cache_dir=str(tmp_path))
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(10, 134, 1000), rng.uniform(10, 134, 1000)
+    headings = rng.uniform(-math.pi, math.pi, 1000)
+
+    expected = field_model.cast_rays(x, y, headings)[:, 0]
+    distances = table.lookup(x, y, headings)[:, 0]
+    assert np.median(np.abs(distances - expected)) < 0.5
+
+
+def test_partial_misses_are_never_blended(tmp_path):
+    # Two walls of an open corner: plenty of rays near the miss boundary
+    field_model = FieldModel([((0, 0), (100, 0)), ((0, 0), (0, 100))])
+    table = RangeTable(field_model, resolution=2.0, theta_bins=90, cache_dir=str(tmp_path))
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(1, 99, 20000), rng.uniform(1, 99, 20000)
+    headings = rng.uniform(0, 2 * math.pi, 20000)
+
+    expected = field_model.cast_rays(x, y, headings)[:, 0]
+    distances = table.lookup(x, y, headings)[:, 0]
+    # Nothing on this map is further than the diagonal, a blend with the sentinel would be
+    assert np.all(~np.isfinite(distances) | (distances <= 100 * math.sqrt(2)))
+    assert np.mean(np.isfinite(distances) == np.isfinite(expected)) > 0.98
+
+
+def test_table_is_cached_and_memory_mapped(tmp_path):
+    field_model = FieldModel()
+    first = RangeTable(field_model, resolution=4.0, theta_bins=36, cache_dir=str(tmp_path))
+    mtime = (tmp_path / first.path.split("/")[-1]).stat().st_mtime_ns
+
+    second = RangeTable(field_model, resolution=4.0, theta_bins=36, cache_dir=str(tmp_path))
+    assert second.path == first.path
+    assert (tmp_path / second.path.split("/")[-1]).stat().st_mtime_ns == mtime
+    assert isinstance(second.table, np.memmap)
+
+    other = RangeTable(field_model, resolution=4.0, theta_bins=72, cache_dir=str(tmp_path))
+    assert other.path != first.path
+
+
+def test_pickle_reopens_the_cache_file(tmp_path):
+    table = RangeTable(FieldModel(), resolution=4.0, theta_bins=36, cache_dir=str(tmp_path))
+    clone = pickle.loads(pickle.dumps(table))
+    assert isinstance(clone.table, np.memmap)
+    np.testing.assert_array_equal(clone.lookup([50.0], [60.0], [1.0]), table.lookup([50.0], [60.0], [1.0]))
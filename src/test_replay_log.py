@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+from filter_worker import FilterWorker
+from particle_filter import ParticleFilter
+from replay_log import LogRecorder, LogReplayer
+
+START = [30.0, 40.0, 0.0]
+
+
+def record_session(path, snapshot_interval=5):
+    """Drive a worker by hand for 30 ticks with a few commands in between, return its filter"""
+    particle_filter = ParticleFilter(400, (144, 144), list(START), seed=3)
+    recorder = LogRecorder(path, len(particle_filter.sensor_offsets), snapshot_interval)
+    worker = FilterWorker(particle_filter, recorder=recorder)
+
+    location = list(START)
+    for tick in range(30):
+        location[0] += 1.5
+        location[2] += 0.02
+        worker.submit_odometry((1.5, 0.0, 0.02), location)
+        if tick == 7:
+            worker.submit(lambda pf: pf.set_noise(0.4))
+        if tick == 12:
+            worker.submit(lambda pf: pf.resize(900))
+        if tick == 20:
+            worker.submit(lambda pf: pf.resize(250))
+        worker.step()
+    recorder.close()
+    return worker.particle_filter
+
+
+def fresh_filter(path):
+    with LogReplayer(path) as replayer:
+        _, robot_location, _ = replayer.tick(0)
+    # Deliberately not what was recorded, the log has to carry all of it
+    return ParticleFilter(50, (144, 144), list(robot_location), seed=99)
+
+
+def test_replay_reproduces_a_recorded_session(tmp_path):
+    path = str(tmp_path / "run.mcllog")
+    recorded = record_session(path)
+
+    replayed = fresh_filter(path)
+    with LogReplayer(path) as replayer:
+        assert len(replayer) == 30
+        replayer.replay(replayed)
+
+    assert replayed.noise == 0.4
+    assert len(replayed.particles) == 250
+    np.testing.assert_array_equal(replayed.particles.states(), recorded.particles.states())
+    assert replayed.get_estimated_state() == recorded.get_estimated_state()
+
+
+def test_seek_matches_a_full_replay(tmp_path):
+    path = str(tmp_path / "run.mcllog")
+    record_session(path)
+
+    full = fresh_filter(path)
+    with LogReplayer(path) as replayer:
+        replayer.replay(full, 0, 23)
+
+        seeked = fresh_filter(path)
+        assert replayer.seek(seeked, 23) == 23
+    np.testing.assert_array_equal(seeked.particles.states(), full.particles.states())
+
+
+def test_commands_in_one_tick_share_a_snapshot(tmp_path):
+    path = str(tmp_path / "run.mcllog")
+    particle_filter = ParticleFilter(100, (144, 144), list(START), seed=0)
+    recorder = LogRecorder(path, len(particle_filter.sensor_offsets))
+    worker = FilterWorker(particle_filter, recorder=recorder)
+    for noise in (0.2, 0.3, 0.4):
+        worker.submit(lambda pf, noise=noise: pf.set_noise(noise))
+    worker.submit_odometry((2.0, 0.0, 0.0), START)
+    worker.step()
+    recorder.close()
+
+    with LogReplayer(path) as replayer:
+        assert len(replayer.snapshots) == 1
+        replayed = fresh_filter(path)
+        replayer.replay(replayed)
+    assert replayed.noise == 0.4
+
+def test_seek_before_the_first_snapshot_fails(tmp_path):
+    path = str(tmp_path / "run.mcllog")
+    with LogRecorder(path, 4) as recorder:
+        recorder.record_tick((1, 0, 0), START, [1, 2, 3, 4])
+    with LogReplayer(path) as replayer:
+        with pytest.raises(ValueError):
+            replayer.seek(fresh_filter(path), 0)
+
+
+def test_truncated_final_record_is_ignored(tmp_path):
+    path = tmp_path / "run.mcllog"
+    with LogRecorder(str(path), 4) as recorder:
+        for tick in range(3):
+            recorder.record_tick((tick, 0, 0), START, [1, 2, 3, 4])
+    path.write_bytes(path.read_bytes()[:-5])
+
+    with LogReplayer(str(path)) as replayer:
+        assert len(replayer) == 2
+        delta, location, measurements = replayer.tick(1)
+        assert delta.tolist() == [1, 0, 0]
+        assert location.tolist() == START
+        assert measurements.tolist() == [1, 2, 3, 4]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a_log"
+    path.write_bytes(b"\x00" * 64)
+    with pytest.raises(ValueError):
+        LogReplayer(str(path))
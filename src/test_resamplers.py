@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from resamplers import RESAMPLERS, residual, systematic
+
+WEIGHTS = np.array([0.31, 0.02, 0.17, 0.0, 0.05, 0.2, 0.01, 0.09, 0.15, 0.0])
+
+
+@pytest.mark.parametrize("name", sorted(RESAMPLERS))
+def test_expected_counts_are_proportional_to_weights(name):
+    rng = np.random.default_rng(0)
+    n, trials = 50, 4000
+    counts = np.zeros(len(WEIGHTS))
+    for _ in range(trials):
+        indices = RESAMPLERS[name](WEIGHTS, n, rng)
+        assert len(indices) == n
+        counts += np.bincount(indices, minlength=len(WEIGHTS))
+
+    # Multinomial has the largest per-trial spread, n * w * (1 - w)
+    tolerance = 5 * np.sqrt(n * WEIGHTS * (1 - WEIGHTS) / trials) + 1e-9
+    np.testing.assert_array_less(np.abs(counts / trials - n * WEIGHTS), tolerance)
+
+
+@pytest.mark.parametrize("name", sorted(RESAMPLERS))
+def test_zero_weight_particles_are_never_picked(name):
+    rng = np.random.default_rng(1)
+    indices = RESAMPLERS[name](WEIGHTS, 1000, rng)
+    assert not np.isin(indices, np.flatnonzero(WEIGHTS == 0)).any()
+
+
+@pytest.mark.parametrize("name", sorted(RESAMPLERS))
+def test_unnormalized_weights(name):
+    indices = RESAMPLERS[name](WEIGHTS * 37.0, 200, np.random.default_rng(2))
+    assert len(indices) == 200 and indices.min() >= 0 and indices.max() < len(WEIGHTS)
+
+
+def test_low_variance_resamplers_stay_within_one_copy():
+    rng = np.random.default_rng(3)
+    n = 64
+    for resampler in (systematic, residual):
+        counts = np.bincount(resampler(WEIGHTS, n, rng), minlength=len(WEIGHTS))
+        assert np.all(counts >= np.floor(n * WEIGHTS))
+    counts = np.bincount(systematic(WEIGHTS, n, rng), minlength=len(WEIGHTS))
+    assert np.all(counts <= np.ceil(n * WEIGHTS))
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from grid_map import GridMap
+from field_model import FieldModel
+from simulation import STAGES, TRAJECTORIES, run_simulation
+
+
+@pytest.mark.parametrize("name", sorted(TRAJECTORIES))
+def test_trajectories_line_up_poses_and_deltas(name):
+    trajectory = TRAJECTORIES[name](40)
+    assert len(trajectory) == 40
+    assert trajectory.poses.shape == (41, 3)
+
+
+def test_filter_converges_on_a_straight_line():
+    result = run_simulation(TRAJECTORIES["straight"](60), 1000, seed=0, trace_memory=False)
+    assert result["ticks"] == 60
+    assert set(result["stage_seconds"]) == set(STAGES)
+    assert result["final_position_error"] < 5.0
+
+
+def test_runs_are_reproducible():
+    trajectory = TRAJECTORIES["loop"](20)
+    first = run_simulation(trajectory, 300, seed=4, trace_memory=False)
+    second = run_simulation(trajectory, 300, seed=4, trace_memory=False)
+    assert first["position_error"] == second["position_error"]
+
+
+def test_configure_runs_before_the_first_tick():
+    seen = []
+    result = run_simulation(TRAJECTORIES["straight"](10), 200, seed=0, trace_memory=True,
+                            configure=lambda particle_filter: seen.append(len(particle_filter.particles)))
+    assert seen == [200]
+    assert result["peak_memory_bytes"] > 0
+
+
+def test_runs_on_a_grid_map():
+    grid = GridMap.from_field_model(FieldModel(), resolution=1.0)
+    seen = []
+    result = run_simulation(TRAJECTORIES["straight"](10), 200, seed=0, trace_memory=False,
+                            configure=seen.append, field_model=grid)
+    assert seen[0].field_model is grid
+    assert np.isfinite(result["position_error"]["mean"])
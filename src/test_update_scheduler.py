@@ -0,0 +1,43 @@
+import math
+import pytest
+from update_scheduler import UpdateScheduler
+
+
+def test_updates_wait_for_enough_motion():
+    scheduler = UpdateScheduler(min_translation=1.0, min_rotation=0.1)
+    scheduler.accumulate((0.8, 0.0, 0.0))
+    assert not scheduler.should_update()
+    scheduler.accumulate((0.0, 0.8, 0.0))
+    assert scheduler.should_update()
+    assert scheduler.take() == [0.8, 0.8, 0.0]
+    assert scheduler.coalesced == 1
+
+    scheduler.accumulate((0.0, 0.0, -0.2))
+    assert scheduler.should_update()
+
+
+def test_force_runs_one_update():
+    scheduler = UpdateScheduler()
+    scheduler.force()
+    assert scheduler.should_update()
+    scheduler.take()
+    assert not scheduler.should_update()
+
+
+def test_budget_backs_off_and_recovers():
+    scheduler = UpdateScheduler(base_rate=10.0, tick_budget=0.05, min_rate=2.0, smoothing=1.0)
+    scheduler.record_cost(0.2)
+    assert scheduler.interval == pytest.approx(0.4)
+    scheduler.record_cost(10.0)
+    assert scheduler.interval == pytest.approx(0.5)
+    scheduler.record_cost(0.01)
+    assert scheduler.interval == pytest.approx(0.1)
+
+
+def test_without_a_budget_the_rate_is_fixed():
+    scheduler = UpdateScheduler(base_rate=20.0)
+    scheduler.record_cost(1.0)
+    assert scheduler.interval == pytest.approx(0.05)
+    scheduler.set_base_rate(5.0)
+    assert scheduler.interval == pytest.approx(0.2)
+    assert math.isclose(scheduler.stats()["average_cost"], 1.0)
@@ -0,0 +1,77 @@
+import os
+import numpy as np
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtGui import QColor, QImage, QPainter
+from PyQt6.QtWidgets import QApplication, QWidget
+from particle_set import ParticleSet
+from particle_visualizer import ParticleVisualizer
+from visualization_widget import VisualizationWidget
+
+
+@pytest.fixture(scope="module")
+def widget():
+    app = QApplication.instance() or QApplication([])
+    parent = QWidget()
+    parent.pixels_per_inch = 2
+    parent.box_size_inches = (144, 144)
+    parent.box_size_pixels = (288, 288)
+    yield VisualizationWidget(parent)
+    parent.deleteLater()
+    app.processEvents()
+
+
+def render(draw, particles):
+    image = QImage(300, 300, QImage.Format.Format_ARGB32)
+    image.fill(QColor(255, 255, 255))
+    painter = QPainter(image)
+    draw(painter, particles, 0, 0)
+    painter.end()
+    return image
+
+
+def particles_at(points, theta=0.0):
+    particles = ParticleSet(len(points))
+    particles.x[:], particles.y[:] = np.array(points, dtype=float).T
+    particles.theta[:] = theta
+    return particles
+
+
+def is_white(image, x, y):
+    return image.pixelColor(x, y) == QColor(255, 255, 255)
+
+
+def test_particles_and_heading_lines_land_where_expected(widget):
+    image = render(widget.draw_particles, particles_at([(20, 30), (100, 50)], theta=np.pi / 2))
+    # Points at 2 px per inch
+    assert not is_white(image, 40, 60) and not is_white(image, 200, 100)
+    # Heading lines point down (+y) for theta = π/2
+    assert not is_white(image, 40, 68) and is_white(image, 48, 60)
+    assert is_white(image, 120, 120)
+
+
+def test_many_particles_draw_in_bulk(widget):
+    rng = np.random.default_rng(0)
+    particles = particles_at(np.column_stack((rng.uniform(0, 144, 5000), rng.uniform(0, 144, 5000))))
+    image = render(widget.draw_particles, particles)
+    assert not is_white(image, *np.rint(particles.states()[0, :2] * 2).astype(int))
+
+
+def test_heatmap_covers_the_dense_spot(widget):
+    particles = particles_at([(72.2, 72.2)] * 50 + [(10.2, 10.2)])
+    particles.weight[:] = 1.0 / 51
+    image = render(widget.draw_heatmap, particles)
+    assert image.pixelColor(145, 145).red() < image.pixelColor(21, 21).red()
+    assert is_white(image, 250, 40)
+
+
+def test_particle_slider_reaches_the_heatmap(widget):
+    # The widget fixture owns the QApplication
+    visualizer = ParticleVisualizer((144, 144))
+    try:
+        assert visualizer.particle_slider.maximum() > visualizer.vis_widget.heatmap_threshold
+    finally:
+        visualizer.close()
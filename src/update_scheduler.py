@@ -0,0 +1,107 @@
+import math
+
+
+class UpdateScheduler:
+    def __init__(self, base_rate=10.0, min_translation=0.5, min_rotation=0.05, tick_budget=None,
+                 min_rate=1.0, smoothing=0.3):
+        """
+        Decides when the filter loop should run a measurement update and how long to wait between ticks
+
+        Odometry deltas are coalesced until the accumulated motion crosses one of
+        the thresholds; until then ticks are skipped so a stationary robot doesn't
+        burn CPU or collapse particle diversity by resampling the same evidence.
+        With a tick budget the tick interval is stretched while updates cost more
+        than the budget and relaxes back to the base rate once they fit again.
+
+        Args:
+            base_rate: Nominal ticks per second
+            min_translation: Accumulated translation (inches) that triggers an update
+            min_rotation: Accumulated rotation (radians) that triggers an update
+            tick_budget: Seconds one update may take before the interval is stretched (None = fixed rate)
+            min_rate: Lowest tick rate the budget may back off to
+            smoothing: Weight of the newest tick cost in the running cost average
+        """
+        self.base_rate = base_rate
+        self.min_translation = min_translation
+        self.min_rotation = min_rotation
+        self.tick_budget = tick_budget
+        self.min_rate = min_rate
+        self.smoothing = smoothing
+
+        self.pending = [0.0, 0.0, 0.0]
+        self.pending_count = 0
+        self.average_cost = None
+        self.interval = 1.0 / base_rate
+        self.executed = 0
+        self.skipped = 0
+        self.coalesced = 0
+        self._forced = False
+
+    def set_base_rate(self, base_rate):
+        self.base_rate = base_rate
+        self.interval = self._budget_interval()
+
+    def set_thresholds(self, min_translation=None, min_rotation=None):
+        if min_translation is not None:
+            self.min_translation = min_translation
+        if min_rotation is not None:
+            self.min_rotation = min_rotation
+
+    def set_tick_budget(self, tick_budget):
+        self.tick_budget = tick_budget
+        self.interval = self._budget_interval()
+
+    def accumulate(self, delta_state):
+        """Add an odometry delta to the motion waiting for the next update"""
+        self.pending = [p + d for p, d in zip(self.pending, delta_state)]
+        self.pending_count += 1
+
+    def force(self):
+        """Run the next tick regardless of motion (e.g. after the filter was replaced)"""
+        self._forced = True
+
+    def should_update(self):
+        """True if the accumulated motion (or a forced update) warrants a measurement update"""
+        if self._forced:
+            return True
+        dx, dy, dtheta = self.pending
+        return math.hypot(dx, dy) >= self.min_translation or abs(dtheta) >= self.min_rotation
+
+    def take(self):
+        """Hand out the coalesced delta and start accumulating again"""
+        delta = self.pending
+        # Every odometry delta past the first was folded into this update
+        self.coalesced += max(self.pending_count - 1, 0)
+        self.pending = [0.0, 0.0, 0.0]
+        self.pending_count = 0
+        self._forced = False
+        self.executed += 1
+        return delta
+
+    def skip(self):
+        self.skipped += 1
+
+    def record_cost(self, seconds):
+        """Feed back how long the last executed update took"""
+        if self.average_cost is None:
+            self.average_cost = seconds
+        else:
+            self.average_cost += self.smoothing * (seconds - self.average_cost)
+        self.interval = self._budget_interval()
+
+    def _budget_interval(self):
+        base_interval = 1.0 / self.base_rate
+        if self.tick_budget is None or self.average_cost is None:
+            return base_interval
+        # Stretch the interval by how far over budget the updates run
+        scale = max(self.average_cost / self.tick_budget, 1.0)
+        return min(base_interval * scale, max(1.0 / self.min_rate, base_interval))
+
+    def stats(self):
+        return {
+            "executed": self.executed,
+            "skipped": self.skipped,
+            "coalesced": self.coalesced,
+            "interval": self.interval,
+            "average_cost": self.average_cost,
+        }
@@ -1,7 +1,9 @@
 import numpy as np
+from PyQt6 import sip
 from PyQt6.QtWidgets import QWidget
-from PyQt6.QtGui import QPainter, QColor, QPen, QBrush
-from PyQt6.QtCore import Qt, QPoint, QPointF
+from PyQt6.QtGui import QPainter, QColor, QPen, QBrush, QPixmap, QImage, QFont
+from PyQt6.QtCore import Qt, QPoint, QPointF, QRectF
+from profiler import PROFILER
 
 
 class VisualizationWidget(QWidget):
@@ -15,16 +17,49 @@ class VisualizationWidget(QWidget):
         super().__init__(parent)
         self.particle_visualizer = parent
         self.setMouseTracking(True)
-    
-    def paintEvent(self, event):
-        """Paint the visualization"""
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        # Calculate the center offset for the simulation box
+
+        # Above this many particles draw a density heatmap instead of individual particles
+        self.heatmap_threshold = 2000
+        # Heatmap cells per inch
+        self.heatmap_resolution = 1.0
+
+        # Profiler overlay (see profiler.PROFILER), off by default
+        self.show_profiler = False
+
+        # Box and grid are static, so they are drawn once into a cached pixmap
+        self._static_pixmap = None
+        self._static_key = None
+
+    def set_heatmap_threshold(self, threshold):
+        """Set the particle count above which the density heatmap is drawn"""
+        self.heatmap_threshold = threshold
+        self.update()
+
+    def box_margins(self):
+        """Offset of the simulation box inside the widget (it is centered)"""
         margin_x = (self.width() - self.particle_visualizer.box_size_pixels[0]) // 2
         margin_y = (self.height() - self.particle_visualizer.box_size_pixels[1]) // 2
-        
+        return margin_x, margin_y
+
+    def resizeEvent(self, event):
+        self._static_pixmap = None
+        super().resizeEvent(event)
+
+    def static_pixmap(self):
+        """Pixmap with the box border and grid lines, rebuilt only when the layout changes"""
+        ratio = self.devicePixelRatioF()
+        key = (self.width(), self.height(), ratio, self.particle_visualizer.box_size_pixels)
+        if self._static_pixmap is not None and self._static_key == key:
+            return self._static_pixmap
+
+        pixmap = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        margin_x, margin_y = self.box_margins()
+
         # Draw the simulation box border
         painter.setPen(QPen(QColor(0, 0, 0), 2))
         painter.drawRect(
@@ -43,50 +78,133 @@ class VisualizationWidget(QWidget):
         for i in range(24, int(self.particle_visualizer.box_size_inches[1]), 24):
             y = margin_y + i * self.particle_visualizer.pixels_per_inch
             painter.drawLine(margin_x, y, margin_x + self.particle_visualizer.box_size_pixels[0], y)
-        
-        # Draw particles
-        particles = self.particle_visualizer.particle_filter.get_particles()
+        painter.end()
+
+        self._static_pixmap = pixmap
+        self._static_key = key
+        return pixmap
+
+    def draw_particles(self, painter, particles, margin_x, margin_y):
+        """Draw every particle with two bulk calls (points, then heading lines)"""
+        ppi = self.particle_visualizer.pixels_per_inch
+        n = len(particles)
+        px = margin_x + particles.x * ppi
+        py = margin_y + particles.y * ppi
+
+        # QPointF is two packed doubles, so the sip arrays are filled straight from numpy
+        points = sip.array(QPointF, n)
+        xy = np.frombuffer(points, dtype=np.float64).reshape(n, 2)
+        xy[:, 0] = px
+        xy[:, 1] = py
+
+        # Round 6px points stand in for the radius 3 circles
+        point_pen = QPen(QColor(0, 0, 255, 90), 6)
+        point_pen.setCapStyle(Qt.PenCapStyle.RoundCap)
+        painter.setPen(point_pen)
+        painter.drawPoints(points)
+
+        # Direction lines as (start, end) point pairs
+        line_length = 10
+        pairs = sip.array(QPointF, 2 * n)
+        ends = np.frombuffer(pairs, dtype=np.float64).reshape(n, 4)
+        ends[:, 0] = px
+        ends[:, 1] = py
+        ends[:, 2] = px + line_length * np.cos(particles.theta)
+        ends[:, 3] = py + line_length * np.sin(particles.theta)
         painter.setPen(QPen(QColor(0, 0, 255, 128), 1))
+        painter.drawLines(pairs)
+
+    def draw_heatmap(self, painter, particles, margin_x, margin_y):
+        """Draw the particle density as a 2D histogram rasterized into a QImage"""
+        box_w, box_h = self.particle_visualizer.box_size_inches
+        bins_x = max(1, int(box_w * self.heatmap_resolution))
+        bins_y = max(1, int(box_h * self.heatmap_resolution))
+
+        density, _, _ = np.histogram2d(
+            particles.x, particles.y,
+            bins=(bins_x, bins_y),
+            range=((0, box_w), (0, box_h)),
+            weights=particles.weight
+        )
+        peak = density.max()
+        if peak <= 0:
+            return
+
+        # Image rows are y, histogram rows are x
+        rgba = np.zeros((bins_y, bins_x, 4), dtype=np.uint8)
+        rgba[..., 2] = 255
+        rgba[..., 3] = np.sqrt(density.T / peak) * 230
+
+        image = QImage(rgba.tobytes(), bins_x, bins_y, 4 * bins_x, QImage.Format.Format_RGBA8888).copy()
+        target = QRectF(
+            margin_x,
+            margin_y,
+            self.particle_visualizer.box_size_pixels[0],
+            self.particle_visualizer.box_size_pixels[1]
+        )
+        painter.drawImage(target, image)
+
+    def draw_profiler_overlay(self, painter):
+        """Draw the per-stage timings in the top left corner"""
+        lines = PROFILER.summary_lines() or ["profiler: no samples yet"]
+        font = QFont("Monospace")
+        font.setStyleHint(QFont.StyleHint.TypeWriter)
+        font.setPointSize(9)
+        painter.setFont(font)
+        line_height = painter.fontMetrics().height()
+
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QBrush(QColor(255, 255, 255, 200)))
+        width = max(painter.fontMetrics().horizontalAdvance(line) for line in lines) + 12
+        painter.drawRect(4, 4, width, line_height * len(lines) + 8)
+
+        painter.setPen(QPen(QColor(0, 0, 0)))
+        for i, line in enumerate(lines):
+            painter.drawText(10, 8 + line_height * (i + 1) - painter.fontMetrics().descent(), line)
+
+    def paintEvent(self, event):
+        """Paint the visualization"""
+        with PROFILER.stage("paint"):
+            painter = QPainter(self)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        
+            # Calculate the center offset for the simulation box
+            margin_x, margin_y = self.box_margins()
+
+            painter.drawPixmap(0, 0, self.static_pixmap())
+        
+            # Draw particles from the latest completed filter tick
+            snapshot = self.particle_visualizer.worker.latest()
+            if snapshot is not None:
+                particles = snapshot.particles
+                if len(particles) > self.heatmap_threshold:
+                    self.draw_heatmap(painter, particles, margin_x, margin_y)
+                else:
+                    self.draw_particles(painter, particles, margin_x, margin_y)
+        
+            # Draw robot (current state)
+            x, y = self.particle_visualizer.robot_pos_inches
+            theta = self.particle_visualizer.robot_theta
         
-        for particle in particles:
-            x, y, theta = particle.get_state()
-            weight = particle.get_weight()
-            
             # Convert to pixel coordinates
             px = margin_x + x * self.particle_visualizer.pixels_per_inch
             py = margin_y + y * self.particle_visualizer.pixels_per_inch
-            
-            # Draw particle
-            painter.setBrush(QBrush(QColor(0, 0, 255, 50)))
-            particle_size = 3
-            painter.drawEllipse(QPointF(px, py), particle_size, particle_size)
-            
-            # Draw direction line
-            line_length = 10
+        
+            # Draw robot body
+            robot_size = 15
+            painter.setPen(QPen(QColor(255, 0, 0), 2))
+            painter.setBrush(QBrush(QColor(255, 0, 0, 128)))
+            painter.drawEllipse(QPointF(px, py), robot_size, robot_size)
+        
+            # Draw robot direction
+            line_length = 20
             dx = line_length * np.cos(theta)
             dy = line_length * np.sin(theta)
+            painter.setPen(QPen(QColor(255, 0, 0), 3))
             painter.drawLine(int(px), int(py), int(px + dx), int(py + dy))
-        
-        # Draw robot (current state)
-        x, y = self.particle_visualizer.robot_pos_inches
-        theta = self.particle_visualizer.robot_theta
-        
-        # Convert to pixel coordinates
-        px = margin_x + x * self.particle_visualizer.pixels_per_inch
-        py = margin_y + y * self.particle_visualizer.pixels_per_inch
-        
-        # Draw robot body
-        robot_size = 15
-        painter.setPen(QPen(QColor(255, 0, 0), 2))
-        painter.setBrush(QBrush(QColor(255, 0, 0, 128)))
-        painter.drawEllipse(QPointF(px, py), robot_size, robot_size)
-        
-        # Draw robot direction
-        line_length = 20
-        dx = line_length * np.cos(theta)
-        dy = line_length * np.sin(theta)
-        painter.setPen(QPen(QColor(255, 0, 0), 3))
-        painter.drawLine(int(px), int(py), int(px + dx), int(py + dy))
+
+        if self.show_profiler:
+            self.draw_profiler_overlay(painter)
     
     def mousePressEvent(self, event):
         """Handle mouse press events"""